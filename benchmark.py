@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import convert_manabox_tcgp as converter_module
+from convert_manabox_tcgp import (
+	ConversionResult, Converter, describe_manabox_row, find_best_match, standard_key,
+)
+from normalization import normalize_card_name, normalize_key, normalize_set_name
+from streaming import EntryAggregator
+
+# Benchmark settings
+BASELINE_FILE = Path(__file__).with_name("benchmark_baselines.json")
+REFERENCE_SIZES = (10_000, 100_000, 500_000)  # Reference rows; each printing has 10 condition/foil rows
+INVENTORY_ROWS = 5_000
+MATCH_SAMPLE = 500  # find_best_match is timed one key at a time, so on a sample
+SEED = 1
+REPEATS = 3  # Each stage reports its best run, which is far steadier than a single one
+MIN_STAGE_SECONDS = 0.25  # Short stages are looped until they have run this long
+REGRESSION_TOLERANCE = 0.25  # Throughput may drop this far below the baseline before it is flagged
+
+# Vocabulary for the synthetic catalog
+NAME_WORDS = (
+		"angel dragon goblin elf shadow light storm fire ice lord queen king knight blade sword wolf bear tide "
+		"sun moon star ash bone blood iron stone wind thorn sky vault rune aether mire grove spire ember frost "
+		"wraith oracle titan serpent sphinx hydra golem relic beacon ritual"
+).split()
+SET_WORDS = "Eternities Karlov Dominaria Tarkir Ixalan Innistrad Zendikar Kamigawa Theros Kaldheim Ravnica Eldraine".split()
+CONDITIONS = ("Near Mint", "Lightly Played", "Moderately Played", "Heavily Played", "Damaged")
+MANABOX_CONDITIONS = ("near_mint", "near_mint", "near_mint", "lightly_played", "moderately_played", "damaged", "mint")
+RARITIES = ("Common", "Common", "Uncommon", "Rare", "Mythic")
+VARIANT_SUFFIXES = (" (Showcase)", " (Borderless)", " (Extended Art)")
+TOKEN_SHARE = 0.04
+REFERENCE_FIELDS = (
+		"TCGplayer Id", "Product Line", "Set Name", "Product Name", "Title", "Number", "Rarity", "Condition",
+		"TCG Market Price", "TCG Direct Low", "TCG Low Price With Shipping", "TCG Low Price", "Total Quantity",
+		"Add to Quantity", "TCG Marketplace Price", "Photo URL",
+)
+MANABOX_FIELDS = (
+		"Name", "Set code", "Set name", "Collector number", "Foil", "Rarity", "Quantity", "ManaBox ID",
+		"Scryfall ID", "Purchase price", "Misprint", "Altered", "Condition", "Language", "Purchase price currency",
+)
+
+
+def synthetic_sets(count, rng):
+	"""Set names for a catalog, including the special sets the converter treats differently."""
+	names = {"The List", "Prerelease Cards"}
+	while len(names) < count:
+		names.add(f"{rng.choice(SET_WORDS)} {rng.choice(('Remastered', 'Horizons', 'Legends', 'Masters', 'Rising', 'Chronicles'))}"
+		          f"{'' if rng.random() < 0.5 else ' ' + str(rng.randint(2, 9))}")
+	return sorted(names)
+
+
+def synthetic_printings(reference_rows, seed=SEED):
+	"""Deterministic (name, set, number, rarity) printings, tokens last, for a catalog of the given size."""
+	rng = random.Random(seed)
+	printing_count = max(1, reference_rows // (len(CONDITIONS) * 2))
+	sets = synthetic_sets(max(12, printing_count // 250), rng)
+	token_count = int(printing_count * TOKEN_SHARE)
+	printings = []
+	for _ in range(printing_count - token_count):
+		name = " ".join(rng.choice(NAME_WORDS).title() for _ in range(rng.randint(1, 3)))
+		if rng.random() < 0.05:
+			name += " // " + rng.choice(NAME_WORDS).title()
+		if rng.random() < 0.03:
+			name = "Æ" + name[1:]
+		if rng.random() < 0.1:
+			name += rng.choice(VARIANT_SUFFIXES)
+		number = str(rng.randint(1, 450)) if rng.random() > 0.05 else ""
+		printings.append((name, rng.choice(sets), number, rng.choice(RARITIES)))
+	for _ in range(token_count):
+		name = f"{rng.choice(NAME_WORDS).title()} Token"
+		if rng.random() < 0.2:
+			name = f"{rng.choice(NAME_WORDS).title()} // {rng.choice(NAME_WORDS).title()} Double-Sided Token"
+		printings.append((name, rng.choice(sets) + " Tokens", str(rng.randint(1, 30)), "Token"))
+	return printings
+
+
+def generate_reference(path, reference_rows, seed=SEED):
+	"""Write a TCGplayer-style reference export; returns its printings."""
+	rng = random.Random(seed + 1)
+	printings = synthetic_printings(reference_rows, seed)
+	with open(path, "w", newline="", encoding="utf-8") as reference_file:
+		writer = csv.writer(reference_file)
+		writer.writerow(REFERENCE_FIELDS)
+		tcgplayer_id = 100_000
+		for name, set_name, number, rarity in printings:
+			for condition in CONDITIONS:
+				for finish in ("", " Foil"):
+					tcgplayer_id += 1
+					market_price = f"{rng.random() * 5:.2f}"
+					marketplace_price = f"{rng.random() * 5:.2f}" if rng.random() > 0.2 else ""
+					writer.writerow([tcgplayer_id, "Magic", set_name, name, "", number, rarity, condition + finish,
+					                 market_price, "", "", "", 0, "", marketplace_price, ""])
+	return printings
+
+
+def generate_inventory(path, printings, inventory_rows=INVENTORY_ROWS, seed=SEED):
+	"""Write a Manabox export drawn from the catalog, with the usual naming and numbering drift."""
+	rng = random.Random(seed + 2)
+	tokens = [printing for printing in printings if printing[3] == "Token"]
+	cards = [printing for printing in printings if printing[3] != "Token"]
+	with open(path, "w", newline="", encoding="utf-8") as inventory_file:
+		writer = csv.writer(inventory_file)
+		writer.writerow(MANABOX_FIELDS)
+		for row_index in range(inventory_rows):
+			if tokens and rng.random() < 0.08:
+				name, set_name, number, rarity = rng.choice(tokens)
+				if rng.random() < 0.3:
+					set_name = "T" + "".join(word[0] for word in set_name.split()[:3]).upper()
+			else:
+				name, set_name, number, rarity = rng.choice(cards)
+				for suffix in VARIANT_SUFFIXES:
+					name = name.replace(suffix, "")
+				if rng.random() < 0.05:
+					name = name[:-1]  # Typo
+				if number and rng.random() < 0.08:
+					number = str(int(number) + 1)  # Neighbouring printing
+				if rng.random() < 0.03:
+					set_name = "Unknown Set"
+				if set_name == "The List":
+					number = f"PLST-ABC-{number}"
+			writer.writerow([name, "abc", set_name, number, rng.choice(("normal", "normal", "foil")), rarity.lower(),
+			                 rng.randint(1, 4), row_index, "", f"{rng.random() * 3:.2f}", "false", "false",
+			                 rng.choice(MANABOX_CONDITIONS), "en", "USD"])
+
+
+def timed(label, rows, function, *args, repeatable=False):
+	"""Run one stage quietly and measure its throughput; repeatable stages are looped to MIN_STAGE_SECONDS."""
+	output = io.StringIO()
+	runs = 0
+	start_time = time.perf_counter()
+	with contextlib.redirect_stdout(output):
+		while True:
+			value = function(*args)
+			runs += 1
+			seconds = time.perf_counter() - start_time
+			if not repeatable or seconds >= MIN_STAGE_SECONDS:
+				break
+	seconds /= runs
+	return value, {"stage": label, "rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+
+
+def generate_data(reference_rows, inventory_rows, work_dir):
+	"""Write the catalog, inventory and an empty Scryfall dump for one size."""
+	reference_csv = work_dir / f"reference_{reference_rows}.csv"
+	inventory_csv = work_dir / f"manabox_{reference_rows}.csv"
+	bulk_file = work_dir / "default-cards-empty.json"
+	printings = generate_reference(reference_csv, reference_rows)
+	generate_inventory(inventory_csv, printings, inventory_rows)
+	bulk_file.write_text("[]", encoding="utf-8")  # Offline Scryfall mode with no cards: no network, no API stubs
+	with open(inventory_csv, newline="", encoding="utf-8") as inventory_file:
+		inventory = list(csv.DictReader(inventory_file))
+	return reference_csv, inventory, bulk_file
+
+
+def measure_stages(reference_rows, reference_csv, inventory, bulk_file, work_dir):
+	"""Benchmark every stage against one generated catalog."""
+	# Compiled reference caches go to the scratch folder, so the first load is always cold
+	converter_module.REFERENCE_CACHE_DIR = work_dir / "cache"
+	shutil.rmtree(converter_module.REFERENCE_CACHE_DIR, ignore_errors=True)
+
+	results = []
+	converter, measured = timed("load_reference_cold", reference_rows, Converter, reference_csv, bulk_file)
+	results.append(measured)
+	converter.close()
+	converter, measured = timed("load_reference_warm", reference_rows, Converter, reference_csv, bulk_file)
+	results.append(measured)
+
+	described = [(row, describe_manabox_row(row)) for row in inventory]
+	key_inputs = [(card_name, set_name, condition, row.get("Collector number", ""))
+	              for row, (card_name, set_name, condition, _) in described]
+	def normalize_keys():
+		# Every pass starts with cold name caches, as a fresh run does
+		normalize_card_name.cache_clear()
+		normalize_set_name.cache_clear()
+		return [normalize_key(*key_input) for key_input in key_inputs]
+
+	_, measured = timed("normalize_key", len(key_inputs), normalize_keys, repeatable=True)
+	results.append(measured)
+
+	standard_keys = []
+	for row, (card_name, set_name, condition, is_token) in described:
+		normalized_result = None if is_token else standard_key(row, condition, card_name, set_name)
+		if normalized_result:
+			standard_keys.append(normalized_result[:4])
+	sample = standard_keys[:MATCH_SAMPLE]
+	_, measured = timed("find_best_match", len(sample), lambda: [
+			find_best_match(key, converter.ref_data, converter.reference_index) for key in sample], repeatable=True)
+	results.append(measured)
+
+	token_rows = [(row, description) for row, description in described if description[3]]
+	def process_tokens():
+		# Every pass gets a fresh result, so pending confirmations and confirmed matches do not carry over
+		token_result = ConversionResult(converter)
+		entries = [converter.process_token(row, token_result, condition, card_name, set_name)
+		           for row, (card_name, set_name, condition, _) in token_rows]
+		token_result.close()
+		return entries
+
+	_, measured = timed("process_token", len(token_rows), process_tokens, repeatable=True)
+	results.append(measured)
+
+	result, measured = timed("end_to_end", len(inventory), converter.convert, inventory)
+	results.append(measured)
+	entries = list(result.entries)
+	result.close()
+
+	# merge_entries became the streaming aggregator; the staged rows are merged again from scratch
+	def merge_entries():
+		aggregator = EntryAggregator(converter_module.OUTPUT_FIELDS)
+		for entry in entries:
+			aggregator.add(entry)
+		merged = sum(1 for _ in aggregator)
+		aggregator.close()
+		return merged
+
+	_, measured = timed("merge_entries", len(entries), merge_entries, repeatable=True)
+	results.append(measured)
+	converter.close()
+	return results
+
+
+def compare(size, results, baselines, tolerance):
+	"""Print each stage next to its baseline; returns the stages that regressed."""
+	regressions = []
+	print(f"\nReference rows: {size:,}")
+	print(f"  {'stage':<22}{'rows':>9}{'seconds':>10}{'rows/s':>12}{'baseline':>12}{'ratio':>8}")
+	for measured in results:
+		baseline = baselines.get(str(size), {}).get(measured["stage"])
+		ratio = measured["rows_per_second"] / baseline if baseline else None
+		flag = ""
+		if ratio is not None and ratio < 1 - tolerance:
+			flag = "  REGRESSION"
+			regressions.append(f"{size}/{measured['stage']}")
+		print(f"  {measured['stage']:<22}{measured['rows']:>9,}{measured['seconds']:>10.3f}"
+		      f"{measured['rows_per_second']:>12,.0f}{(f'{baseline:,.0f}' if baseline else '-'):>12}"
+		      f"{(f'{ratio:.2f}' if ratio is not None else '-'):>8}{flag}")
+	return regressions
+
+
+def main(argv=None):
+	"""Time each converter stage on generated data and check it against the recorded baselines."""
+	parser = argparse.ArgumentParser(description="Benchmark the converter on deterministic synthetic data.")
+	parser.add_argument("--sizes", type=int, nargs="+", default=list(REFERENCE_SIZES),
+	                    help=f"Reference catalog sizes in rows (default: {' '.join(map(str, REFERENCE_SIZES))})")
+	parser.add_argument("--inventory-rows", type=int, default=INVENTORY_ROWS,
+	                    help=f"Manabox rows per run (default: {INVENTORY_ROWS})")
+	parser.add_argument("--baselines", type=Path, default=BASELINE_FILE, help="Baseline throughput file")
+	parser.add_argument("--record", action="store_true", help="Store this run's throughput as the new baselines")
+	parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+	                    help=f"Allowed throughput drop before a stage is flagged (default: {REGRESSION_TOLERANCE})")
+	parser.add_argument("--repeats", type=int, default=REPEATS,
+	                    help=f"Runs per size; each stage keeps its best (default: {REPEATS})")
+	parser.add_argument("--keep-data", metavar="DIR", type=Path, help="Write the generated CSVs here and keep them")
+	args = parser.parse_args(argv)
+
+	baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+	regressions = []
+	with tempfile.TemporaryDirectory(prefix="manafork_bench_") as scratch:
+		work_dir = args.keep_data or Path(scratch)
+		work_dir.mkdir(parents=True, exist_ok=True)
+		for size in args.sizes:
+			generated = generate_data(size, args.inventory_rows, work_dir)
+			best = {}
+			for _ in range(args.repeats):
+				for measured in measure_stages(size, *generated, work_dir):
+					if measured["stage"] not in best or measured["seconds"] < best[measured["stage"]]["seconds"]:
+						best[measured["stage"]] = measured
+			results = list(best.values())
+			regressions += compare(size, results, baselines, args.tolerance)
+			if args.record:
+				baselines[str(size)] = {measured["stage"]: round(measured["rows_per_second"], 1) for measured in results}
+
+	if args.record:
+		args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+		print(f"\nBaselines written to {args.baselines}")
+	elif regressions:
+		print(f"\nThroughput regressions: {', '.join(regressions)}")
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,111 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from scryfall_cache import CACHE_DIR
+
+# Confirmation store location
+CONFIRMATION_FILE = "confirmations.sqlite3"
+
+UNREVIEWED = object()  # No stored decision for a key
+
+
+def encode_key(key):
+	"""Serialize a key tuple for storage."""
+	return json.dumps(list(key))
+
+
+def decode_key(text):
+	"""Restore a key tuple from storage."""
+	return tuple(json.loads(text))
+
+
+class ConfirmationStore:
+	"""Persistent manual match decisions, per normalized key and reference catalog version."""
+
+	def __init__(self, path=None):
+		self.path = Path(path) if path else CACHE_DIR / CONFIRMATION_FILE
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+		# A NULL match records that the reviewer skipped the card
+		self.connection.execute(
+				"CREATE TABLE IF NOT EXISTS confirmations ("
+				"catalog TEXT NOT NULL, key TEXT NOT NULL, match TEXT, confirmed_at REAL NOT NULL, "
+				"PRIMARY KEY (catalog, key))"
+		)
+
+	def load(self, catalog_version):
+		"""Every decision made against a catalog version, as key -> match (None for skipped)."""
+		with self.lock:
+			rows = self.connection.execute(
+					"SELECT key, match FROM confirmations WHERE catalog = ?", (catalog_version,)).fetchall()
+		return {decode_key(key): decode_key(match) if match is not None else None for key, match in rows}
+
+	def record(self, catalog_version, decisions):
+		"""Store decisions given as key -> match (None for skipped) in one transaction."""
+		if not decisions:
+			return
+		now = time.time()
+		with self.lock:
+			self.connection.execute("BEGIN")
+			self.connection.executemany(
+					"INSERT OR REPLACE INTO confirmations (catalog, key, match, confirmed_at) VALUES (?, ?, ?, ?)",
+					[(catalog_version, encode_key(key), encode_key(match) if match is not None else None, now)
+					 for key, match in decisions.items()])
+			self.connection.execute("COMMIT")
+
+	def purge(self, skipped_only=False):
+		"""Remove decisions, optionally only skips."""
+		where = " WHERE match IS NULL" if skipped_only else ""
+		with self.lock:
+			cursor = self.connection.execute(f"DELETE FROM confirmations{where}")
+		return cursor.rowcount
+
+	def stats(self):
+		"""Summarize stored decisions."""
+		total, skipped, catalogs = self.connection.execute(
+				"SELECT COUNT(*), COALESCE(SUM(match IS NULL), 0), COUNT(DISTINCT catalog) FROM confirmations").fetchone()
+		return {
+				"path":      str(self.path),
+				"decisions": total,
+				"confirmed": total - skipped,
+				"skipped":   skipped,
+				"catalogs":  catalogs,
+		}
+
+	def close(self):
+		"""Close the database connection."""
+		self.connection.close()
+
+
+def main(argv=None):
+	"""Inspect or purge stored confirmations."""
+	parser = argparse.ArgumentParser(description="Inspect or purge stored manual match confirmations.")
+	parser.add_argument("--store", help=f"Confirmation database (default: {CACHE_DIR / CONFIRMATION_FILE})")
+	commands = parser.add_subparsers(dest="command", required=True)
+	commands.add_parser("stats", help="Show decision counts")
+	purge = commands.add_parser("purge", help="Delete stored decisions")
+	scope = purge.add_mutually_exclusive_group(required=True)
+	scope.add_argument("--all", action="store_true", help="Delete every decision")
+	scope.add_argument("--skipped", action="store_true", help="Delete skip decisions so those cards are reviewed again")
+	args = parser.parse_args(argv)
+
+	store = ConfirmationStore(args.store)
+	try:
+		if args.command == "stats":
+			stats = store.stats()
+			print(f"Confirmation store: {stats['path']}")
+			print(f"Decisions: {stats['decisions']:,} ({stats['confirmed']:,} confirmed, {stats['skipped']:,} skipped) "
+			      f"across {stats['catalogs']:,} reference catalogs")
+		elif args.command == "purge":
+			print(f"Removed {store.purge(skipped_only=args.skipped):,} decisions")
+	finally:
+		store.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,253 @@
+import argparse
+import csv
+import io
+import json
+import threading
+import time
+import zipfile
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from confirmation_store import ConfirmationStore
+from convert_manabox_tcgp import (
+	FILTER_PRERELEASE, FILTER_PROMO, GIVEN_UP_FILE, MATCH_WORKERS, MISSING_FILE, OUTPUT_FIELDS, STAGED_FILE,
+	ConversionResult, Converter, detect_csv_files, find_bulk_file,
+)
+
+# Service settings
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024  # A Manabox export of a very large collection is a few MB
+CONVERSION_SLOTS = 1  # Matching is CPU-bound under the GIL; more slots would only interleave requests
+LATENCY_WINDOW = 1000  # Recent conversions kept for the latency percentiles
+PENDING_FILE = "pending_confirmation.csv"  # Low-confidence matches nobody reviewed
+PENDING_FIELDS = ["Card Name", "Set", "Number", "Condition", "Rank", "Product Name", "TCGplayer Id", "Score"]
+PENDING_CANDIDATES = 3  # Candidates listed per pending card
+
+
+class ServiceStats:
+	"""Request counters and conversion latencies, shared by the handler threads."""
+
+	def __init__(self, reference_cards, load_seconds):
+		self.lock = threading.Lock()
+		self.started = time.time()
+		self.reference_cards = reference_cards
+		self.load_seconds = load_seconds
+		self.conversions = 0
+		self.failures = 0
+		self.rows = 0
+		self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+	def record(self, seconds, rows):
+		"""Count a finished conversion."""
+		with self.lock:
+			self.conversions += 1
+			self.rows += rows
+			self.latencies.append(seconds)
+
+	def record_failure(self):
+		"""Count a conversion that raised."""
+		with self.lock:
+			self.failures += 1
+
+	def snapshot(self):
+		"""Current figures as a JSON-ready dict."""
+		with self.lock:
+			latencies = sorted(self.latencies)
+			stats = {
+					"uptime_seconds":         round(time.time() - self.started, 1),
+					"reference_cards":        self.reference_cards,
+					"reference_load_seconds": round(self.load_seconds, 3),
+					"conversions":            self.conversions,
+					"failures":               self.failures,
+					"rows_converted":         self.rows,
+			}
+		if latencies:
+			stats["latency_seconds"] = {
+					"last": round(self.latencies[-1], 3),
+					"mean": round(sum(latencies) / len(latencies), 3),
+					"p50":  round(percentile(latencies, 0.50), 3),
+					"p95":  round(percentile(latencies, 0.95), 3),
+					"max":  round(latencies[-1], 3),
+			}
+		return stats
+
+
+def percentile(ordered, fraction):
+	"""Nearest-rank percentile of a sorted list."""
+	return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def csv_bytes(entries, fieldnames=OUTPUT_FIELDS):
+	"""Render output rows as a CSV file body."""
+	buffer = io.StringIO(newline="")
+	writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+	writer.writeheader()
+	writer.writerows(entries)
+	return buffer.getvalue().encode("utf-8")
+
+
+def pending_rows(pending_confirmations):
+	"""List the best candidates of each unreviewed match for the pending file."""
+	for normalized_key, matches, local_ref_data in pending_confirmations:
+		card_name, set_name, number, condition = normalized_key[:4]
+		for rank, (match, score) in enumerate(matches[:PENDING_CANDIDATES], start=1):
+			candidate = local_ref_data.get(match, {})
+			yield {
+					"Card Name":    card_name,
+					"Set":          set_name,
+					"Number":       number,
+					"Condition":    condition,
+					"Rank":         rank,
+					"Product Name": candidate.get("Product Name", ""),
+					"TCGplayer Id": candidate.get("TCGplayer Id", ""),
+					"Score":        round(score, 1),
+			}
+
+
+def build_archive(result):
+	"""Zip the staged inventory and, when they have rows, the unmatched, Scryfall-only and pending files."""
+	buffer = io.BytesIO()
+	with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+		archive.writestr(STAGED_FILE, csv_bytes(result.entries))
+		if result.given_up_cards:
+			archive.writestr(GIVEN_UP_FILE, csv_bytes(result.given_up_cards))
+		if result.scryfall_only_cards:
+			archive.writestr(MISSING_FILE, csv_bytes(result.scryfall_only_cards))
+		if result.pending_confirmations:
+			archive.writestr(PENDING_FILE, csv_bytes(pending_rows(result.pending_confirmations), PENDING_FIELDS))
+	return buffer.getvalue()
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+	"""POST /convert with a Manabox CSV body; GET /health and /stats."""
+
+	server_version = "ManaFork/2.0"
+
+	def do_GET(self):
+		if self.path == "/health":
+			self.send_json(HTTPStatus.OK, {"status": "ok", "reference_cards": self.server.stats.reference_cards})
+		elif self.path == "/stats":
+			self.send_json(HTTPStatus.OK, self.server.stats.snapshot())
+		else:
+			self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+	def do_POST(self):
+		if self.path != "/convert":
+			self.send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+			return
+		length = self.headers.get("Content-Length")
+		if length is None:
+			self.send_json(HTTPStatus.LENGTH_REQUIRED, {"error": "Content-Length is required"})
+			return
+		try:
+			length = int(length)
+		except ValueError:
+			length = -1
+		if length < 0:
+			self.send_json(HTTPStatus.BAD_REQUEST, {"error": "Content-Length must be a non-negative integer"})
+			return
+		if length > MAX_UPLOAD_BYTES:
+			self.send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+			               {"error": f"Upload exceeds {MAX_UPLOAD_BYTES:,} bytes"})
+			return
+		body = self.rfile.read(length)
+
+		start_time = time.time()
+		with self.server.slots:
+			result = ConversionResult(self.server.converter)
+			try:
+				reader = csv.DictReader(io.TextIOWrapper(io.BytesIO(body), encoding="utf-8", newline=""))
+				self.server.converter.convert(reader, result)
+				archive = build_archive(result)
+			except (UnicodeDecodeError, csv.Error, KeyError) as e:
+				self.server.stats.record_failure()
+				self.send_json(HTTPStatus.BAD_REQUEST, {"error": f"Could not read the Manabox CSV: {e}"})
+				return
+			except Exception as e:
+				self.server.stats.record_failure()
+				self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Conversion failed: {e}"})
+				return
+			finally:
+				result.close()
+		elapsed = time.time() - start_time
+		self.server.stats.record(elapsed, result.rows_read)
+
+		self.send_response(HTTPStatus.OK)
+		self.send_header("Content-Type", "application/zip")
+		self.send_header("Content-Disposition", 'attachment; filename="converted_output.zip"')
+		self.send_header("Content-Length", str(len(archive)))
+		self.send_header("X-Rows-Read", str(result.rows_read))
+		# Nobody is there to review low-confidence matches, so they go to the pending file instead
+		self.send_header("X-Pending-Confirmations", str(len(result.pending_confirmations)))
+		self.send_header("X-Conversion-Seconds", f"{elapsed:.3f}")
+		self.end_headers()
+		self.wfile.write(archive)
+
+	def send_json(self, status, payload):
+		"""Reply with a JSON document."""
+		body = json.dumps(payload).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+
+class ConversionServer(ThreadingHTTPServer):
+	"""HTTP server holding one warm Converter for every request."""
+
+	daemon_threads = True
+
+	def __init__(self, address, converter, load_seconds=0.0):
+		super().__init__(address, ConversionHandler)
+		self.converter = converter
+		self.slots = threading.BoundedSemaphore(CONVERSION_SLOTS)
+		self.stats = ServiceStats(len(converter.ref_data), load_seconds)
+
+
+def main(argv=None):
+	"""Load the reference once and serve conversions over HTTP."""
+	parser = argparse.ArgumentParser(description="Serve Manabox to TCGplayer conversions with a warm reference index.")
+	parser.add_argument("--reference", metavar="CSV", help="TCGplayer reference export (auto-detected if omitted)")
+	parser.add_argument("--host", default=DEFAULT_HOST, help=f"Interface to listen on (default: {DEFAULT_HOST})")
+	parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+	parser.add_argument("--bulk-file", metavar="JSON", help="Scryfall default-cards dump for offline lookups")
+	parser.add_argument("--filter-prerelease", action="store_true", default=FILTER_PRERELEASE,
+	                    help="Exclude prerelease products from the reference")
+	parser.add_argument("--filter-promo", action="store_true", default=FILTER_PROMO,
+	                    help="Exclude promotional products from the reference")
+	parser.add_argument("--workers", type=int, default=MATCH_WORKERS,
+	                    help=f"Processes used for candidate scoring (default: {MATCH_WORKERS})")
+	parser.add_argument("--confirmation-store", metavar="FILE",
+	                    help="Manual match decisions made in earlier runs (default: in the cache folder)")
+	args = parser.parse_args(argv)
+
+	reference_csv = args.reference or detect_csv_files()[1]
+	if not reference_csv:
+		parser.error("no TCGplayer reference found; pass --reference")
+
+	start_time = time.time()
+	confirmation_store = ConfirmationStore(args.confirmation_store)
+	try:
+		converter = Converter(reference_csv, bulk_file=find_bulk_file(args.bulk_file),
+		                      filter_prerelease=args.filter_prerelease, filter_promo=args.filter_promo,
+		                      workers=args.workers, confirmation_store=confirmation_store)
+	except FileNotFoundError as e:
+		confirmation_store.close()
+		parser.exit(1, f"{e}\n")
+	server = ConversionServer((args.host, args.port), converter, time.time() - start_time)
+	print(f"Serving conversions on http://{args.host}:{server.server_address[1]} (POST /convert, GET /health, /stats)")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		print("\nShutting down")
+	finally:
+		server.server_close()
+		converter.close()
+		confirmation_store.close()
+
+
+if __name__ == "__main__":
+	main()
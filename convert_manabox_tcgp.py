@@ -1,20 +1,38 @@
+import argparse
 import csv
-import re
+import gc
+import hashlib
+import heapq
+import multiprocessing
+import pickle
 import time
+from array import array
+from collections import ChainMap, defaultdict
 from datetime import datetime
 from pathlib import Path
-from tkinter import Button, END, Frame, Label, Listbox, Scrollbar, Tk, TclError
-from tkinter.filedialog import askopenfilename
 
-import pandas as pd
-import requests
-import unicodedata
-from rapidfuzz import fuzz
+from confirmation_store import UNREVIEWED, ConfirmationStore
+from delta_state import DeltaState, row_fingerprint
+from normalization import (
+	DOUBLE_SIDED_TOKEN, TOKEN_SET_CODE, clean_collector_number, format_cache_stats, normalization_cache_stats,
+	normalize_key, normalize_key_columns,
+)
+from reference_records import CATEGORICAL_COLUMNS, PRICE_COLUMNS, REFERENCE_COLUMNS, build_records
+from run_report import RunReport
+from scryfall_bulk import ScryfallBulkData
+from scryfall_cache import CACHE_DIR, ScryfallCache
+from scryfall_client import ScryfallClient, ScryfallTransportError
+from streaming import EntryAggregator, IncrementalCsvWriter, iter_chunks
 
 # Content filtering configuration
 FILTER_PRERELEASE = False  # Filter prerelease content
 FILTER_PROMO = False  # Filter promotional content
 
+# Compiled reference index cache; bump the version when key building changes
+REFERENCE_CACHE_DIR = CACHE_DIR
+REFERENCE_CACHE_VERSION = 4
+REFERENCE_CACHE_KEEP = 4  # Most recently used compiled indexes kept, e.g. for switching filters or exports
+
 # Set name normalization mappings
 SET_ALIAS = {
 		"Universes Beyond: The Lord of the Rings: Tales of Middle-earth": "LTR",
@@ -40,167 +58,83 @@ condition_rank = {
 		"damaged":           4
 }
 
+# Best score a candidate from another set can reach without an exact collector number
+MAX_CROSS_SET_SCORE = 220
+
+# Score penalties when query and reference disagree on a print treatment
+SPECIAL_PRINT_PENALTIES = {
+		"foil":       40,
+		"showcase":   30,
+		"etched":     30,
+		"borderless": 30,
+		"extended":   30,
+		"gilded":     30
+}
+
+# Streaming settings for large inventories
+STREAM_CHUNK_ROWS = 5000  # Manabox rows read, scored and prefetched together
+MERGE_MEMORY_BUDGET = 100_000  # Merged entries held in memory before spilling to disk
+
+# Parallel matching; workers fork after the reference index is loaded and share it copy-on-write
+MATCH_WORKERS = 1  # Processes scoring candidates, 1 keeps everything in this process
+MIN_PARALLEL_KEYS = 500  # Smaller batches are scored in-process; shipping results back costs more
+
+# Match confidence thresholds
+AUTO_CONFIRM_SCORE = 270  # Accepted without review
+CONFIDENT_SCORE = 260  # Accepted when CONFIDENT_MARGIN ahead of the runner-up; lower scores get a Scryfall check
+CONFIDENT_MARGIN = 30
+SCRYFALL_VERIFIED_SCORE = 350  # Synthetic matches confirmed through Scryfall
+TOKEN_AUTO_CONFIRM_SCORE = 250
+
+# Columns of every output file
+OUTPUT_FIELDS = [
+		"TCGplayer Id", "Product Line", "Set Name", "Product Name",
+		"Number", "Rarity", "Condition", "Add to Quantity", "TCG Marketplace Price"
+]
+STAGED_FILE = "tcgplayer_staged_inventory.csv"
+GIVEN_UP_FILE = "tcgplayer_given_up.csv"
+MISSING_FILE = "cards_missing_from_tcgplayer.csv"  # Scryfall-only variants
+DELTA_FILE = "tcgplayer_delta.csv"  # Quantity changes since the previous delta run
+REPORT_FILE = "run_report.json"  # Timings and match statistics of the run
+
 # Minimum price threshold
 FLOOR_PRICE = 0.10
 
 # External API settings
 SCRYFALL_API_BASE = "https://api.scryfall.com"
-SCRYFALL_RATE_LIMIT = 0.1  # Request throttling interval
-last_scryfall_request = 0
-
-# Processing state management
-given_up_cards = []
-scryfall_only_cards = []  # External data source entries
-confirmed_matches = {}
-scryfall_cache = {}  # API response cache
-pending_confirmations = []  # Deferred user confirmations
-
+SCRYFALL_RATE_LIMIT = 0.1  # Average seconds between requests
+SCRYFALL_BURST = 2  # Requests allowed back to back before throttling
+SCRYFALL_MAX_WORKERS = 8  # Concurrent lookups in flight
+SCRYFALL_COLLECTION_BATCH = 75  # Identifiers per /cards/collection request
+SCRYFALL_BULK_FILE = None  # Local default-cards dump for offline lookups (auto-detected if None)
 
-def rate_limit_scryfall():
-	"""Enforce API request throttling."""
-	global last_scryfall_request
-	current_time = time.time()
-	elapsed = current_time - last_scryfall_request
-	if elapsed < SCRYFALL_RATE_LIMIT:
-		sleep_time = SCRYFALL_RATE_LIMIT - elapsed
-		time.sleep(sleep_time)
-	last_scryfall_request = time.time()
+# Reference index inherited by forked scoring workers
+forked_reference_index = None
 
 
-def write_csv_output(file_path, fieldnames, data_list, description):
-	"""Write card data to CSV file."""
-	with open(file_path, mode='w', newline='', encoding='utf-8') as csvfile:
-		writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-		writer.writeheader()
-		for entry in data_list:
-			writer.writerow(entry)
-	print(f"{description}: {len(data_list)} cards")
-
-
-def query_scryfall_card(card_name, set_code, collector_number=None):
-	"""Retrieve card data with caching."""
-	cache_key = f"{card_name}|{set_code}|{collector_number or ''}"
-	
-	if cache_key in scryfall_cache:
-		return scryfall_cache[cache_key]
-	
-	rate_limit_scryfall()
-	
-	try:
-		# Try exact search first if we have collector number
-		if collector_number:
-			url = f"{SCRYFALL_API_BASE}/cards/{set_code}/{collector_number}"
-			response = requests.get(url, timeout=10)
-			
-			if response.status_code == 200:
-				card_data = response.json()
-				scryfall_cache[cache_key] = card_data
-				return card_data
-		
-		# Fallback to name search in set
-		params = {
-				'q':      f'"{card_name}" set:{set_code}',
-				'format': 'json'
-		}
-		url = f"{SCRYFALL_API_BASE}/cards/search"
-		response = requests.get(url, params=params, timeout=10)
-		
-		if response.status_code == 200:
-			search_data = response.json()
-			if search_data.get('total_cards', 0) > 0:
-				# Return first exact name match
-				for card in search_data.get('data', []):
-					if card.get('name', '').lower() == card_name.lower():
-						scryfall_cache[cache_key] = card
-						return card
-				# If no exact match, return first result
-				first_card = search_data['data'][0]
-				scryfall_cache[cache_key] = first_card
-				return first_card
-		
-		# Cache negative results too
-		scryfall_cache[cache_key] = None
-		return None
-	
-	except Exception as e:
-		print(f"Scryfall API error for {card_name} ({set_code}): {e}")
-		scryfall_cache[cache_key] = None
-		return None
-
-
-def get_scryfall_variants(card_name, set_code):
-	"""Retrieve card variant information."""
-	cache_key = f"variants|{card_name}|{set_code}"
-	
-	if cache_key in scryfall_cache:
-		return scryfall_cache[cache_key]
-	
-	rate_limit_scryfall()
-	
+def scryfall_result(future, description, default=None):
+	"""Wait for a lookup; transport failures count as a miss for this run only."""
 	try:
-		params = {
-				'q':      f'"{card_name}" set:{set_code}',
-				'format': 'json'
-		}
-		url = f"{SCRYFALL_API_BASE}/cards/search"
-		response = requests.get(url, params=params, timeout=10)
-		
-		if response.status_code == 200:
-			search_data = response.json()
-			variants = []
-			for card in search_data.get('data', []):
-				if card.get('name', '').lower() == card_name.lower():
-					variant_info = {
-							'collector_number': card.get('collector_number'),
-							'promo':            card.get('promo', False),
-							'promo_types':      card.get('promo_types', []),
-							'frame_effects':    card.get('frame_effects', []),
-							'finishes':         card.get('finishes', []),
-							'variation':        card.get('variation', False),
-							'full_art':         card.get('full_art', False),
-							'textless':         card.get('textless', False),
-							'image_status':     card.get('image_status'),
-							'border_color':     card.get('border_color')
-					}
-					variants.append(variant_info)
-			
-			scryfall_cache[cache_key] = variants
-			return variants
-		
-		scryfall_cache[cache_key] = []
-		return []
-	
-	except Exception as e:
-		print(f"Scryfall variants error for {card_name} ({set_code}): {e}")
-		scryfall_cache[cache_key] = []
-		return []
+		return future.result()
+	except (ScryfallTransportError, ValueError) as e:
+		print(f"Scryfall error for {description}: {e}")
+		return default
 
 
-def query_scryfall_by_id(scryfall_id):
-	"""Retrieve card data by identifier."""
-	cache_key = f"id|{scryfall_id}"
-	
-	if cache_key in scryfall_cache:
-		return scryfall_cache[cache_key]
-	
-	rate_limit_scryfall()
-	
-	try:
-		url = f"{SCRYFALL_API_BASE}/cards/{scryfall_id}"
-		response = requests.get(url, timeout=10)
-		
-		if response.status_code == 200:
-			card_data = response.json()
-			scryfall_cache[cache_key] = card_data
-			return card_data
-		
-		scryfall_cache[cache_key] = None
-		return None
-	
-	except Exception as e:
-		print(f"Scryfall ID query error for {scryfall_id}: {e}")
-		scryfall_cache[cache_key] = None
-		return None
+def build_variant_info(card):
+	"""Extract printing details from card data."""
+	return {
+			'collector_number': card.get('collector_number'),
+			'promo':            card.get('promo', False),
+			'promo_types':      card.get('promo_types', []),
+			'frame_effects':    card.get('frame_effects', []),
+			'finishes':         card.get('finishes', []),
+			'variation':        card.get('variation', False),
+			'full_art':         card.get('full_art', False),
+			'textless':         card.get('textless', False),
+			'image_status':     card.get('image_status'),
+			'border_color':     card.get('border_color')
+	}
 
 
 def create_scryfall_fallback_entry(scryfall_card, manabox_row, condition):
@@ -224,63 +158,16 @@ def create_scryfall_fallback_entry(scryfall_card, manabox_row, condition):
 	}
 
 
-def enhance_matches_with_scryfall(normalized_key, matches, ref_data, manabox_row=None):
-	"""Supplement matching with external data."""
-	card_name, set_name, collector_number, condition, suffix = normalized_key
-	
-	# First try using Scryfall ID if available from Manabox
-	scryfall_card = None
-	if manabox_row and manabox_row.get("Scryfall ID"):
-		scryfall_id = manabox_row.get("Scryfall ID").strip()
-		if scryfall_id:
-			scryfall_card = query_scryfall_by_id(scryfall_id)
-	
-	# Fallback to name/set search if no ID or ID lookup failed
-	if not scryfall_card:
-		# Convert set name to set code for Scryfall
-		set_code = SET_ALIAS.get(set_name, set_name)
-		# Try common abbreviations
-		if len(set_name) > 3:
-			# Convert "edge of eternities" to "eoe"
-			words = set_name.split()
-			if len(words) >= 2:
-				set_code = ''.join(word[0] for word in words[:3]).lower()
-		
-		scryfall_card = query_scryfall_card(card_name, set_code, collector_number)
-	
-	if scryfall_card:
-		# Check if this variant might be missing from TCGplayer data
-		if not matches or (matches and matches[0][1] < 300):  # Low confidence in existing matches
-			promo_info = ""
-			if scryfall_card.get('promo'):
-				promo_types = scryfall_card.get('promo_types', [])
-				promo_info = f" (Promo: {', '.join(promo_types)})" if promo_types else " (Promo)"
-			
-			# Create a high-confidence synthetic match using Scryfall data
-			if manabox_row:
-				scryfall_entry = create_scryfall_fallback_entry(scryfall_card, manabox_row, condition)
-				# Create a synthetic match key that will score very high
-				synthetic_key = (card_name, set_name, collector_number, condition, suffix)
-				synthetic_match = (synthetic_key, 350)  # Higher than auto-confirm threshold
-				
-				# Add the synthetic entry to ref_data so it can be used
-				ref_data[synthetic_key] = scryfall_entry
-				
-				# Insert at the beginning of matches list
-				matches.insert(0, synthetic_match)
-				print(f"Found Scryfall-only variant{promo_info}")
-	else:
-		print(f"Card not found on Scryfall")
-	
-	return matches
-
-
-def remove_accents(text):
-	"""Normalize character encoding."""
-	return ''.join(
-			c for c in unicodedata.normalize('NFKD', text)
-			if not unicodedata.combining(c)
-	)
+def guess_scryfall_set_code(set_name):
+	"""Convert a normalized set name to a likely Scryfall set code."""
+	set_code = SET_ALIAS.get(set_name, set_name)
+	# Try common abbreviations
+	if len(set_name) > 3:
+		# Convert "edge of eternities" to "eoe"
+		words = set_name.split()
+		if len(words) >= 2:
+			set_code = ''.join(word[0] for word in words[:3]).lower()
+	return set_code
 
 
 def is_double_sided_candidate(product_name):
@@ -311,30 +198,6 @@ def get_market_price(manabox_row, ref_row=None):
 	return f"{FLOOR_PRICE:.2f}"
 
 
-def normalize_key(card_name, set_name, condition, number):
-	"""Standardize card identifiers for comparison."""
-	suffix = ""
-	if "(" in card_name and ")" in card_name:
-		card_name = re.sub(r"\(.*?\)", "", card_name).strip()
-	# Remove accents from card_name
-	card_name = remove_accents(card_name)
-	card_name = card_name.split('//')[0].strip()  # Use only text before '//' if present.
-	normalized_card_name = re.sub(r"[^a-zA-Z0-9 ,'-]", "", card_name).strip().lower()
-	# Remove accents from set_name
-	set_name = remove_accents(set_name)
-	normalized_set_name = re.sub(r"[^a-zA-Z0-9 ]", "", set_name).strip().lower()
-	if normalized_set_name in ["plst", "the list"]:
-		normalized_set_name = "the list reprints"
-	if "prerelease cards" in normalized_set_name:
-		return None
-	if normalized_set_name == "the list":
-		number = number.split("-")[-1] if number else ""
-	normalized_number = re.sub(r"[^\d\-]", "", str(number).strip()) if number else None
-	if normalized_number == "":
-		normalized_number = None
-	return normalized_card_name, normalized_set_name, normalized_number, condition.lower(), suffix
-
-
 def build_given_up_entry(manabox_row, condition, card_name, set_name):
 	"""Create unmatched card entry."""
 	return {
@@ -350,75 +213,408 @@ def build_given_up_entry(manabox_row, condition, card_name, set_name):
 	}
 
 
-def load_reference_data(reference_csv):
-	"""Initialize card database."""
-	start_time = time.time()
-	print("Loading reference database...")
-	
+def reference_catalog_version(reference_csv, filter_prerelease=FILTER_PRERELEASE, filter_promo=FILTER_PROMO):
+	"""Digest of a reference file and its filters."""
+	digest = hashlib.sha256(f"{filter_prerelease}|{filter_promo}|".encode())
+	with open(reference_csv, "rb") as reference_file:
+		for chunk in iter(lambda: reference_file.read(1 << 20), b""):
+			digest.update(chunk)
+	return digest.hexdigest()[:24]
+
+
+def reference_cache_path(catalog_version):
+	"""Locate the compiled index of a reference catalog in the current cache format."""
+	digest = hashlib.sha256(f"{REFERENCE_CACHE_VERSION}|{catalog_version}".encode())
+	return REFERENCE_CACHE_DIR / f"reference_{digest.hexdigest()[:24]}.pickle"
+
+
+def load_reference_cache(cache_path):
+	"""Read a compiled reference index, if present and readable."""
+	if not cache_path.exists():
+		return None
 	try:
-		ref_df = pd.read_csv(reference_csv, dtype={"Number": "str"})
-		# Load reference data length for potential future use
-		_ = len(ref_df)
-		ref_df = ref_df[ref_df["Set Name"].notnull()]
-		
-		# Apply filters
-		excluded_count = 0
-		if FILTER_PRERELEASE:
-			mask = ref_df["Product Name"].str.contains("Prerelease", case=False, na=False)
-			excluded_count += mask.sum()
-			ref_df = ref_df[~mask]
-		
-		if FILTER_PROMO:
-			promo_patterns = [r"\(Bundle\)", r"\(Buyabox\)", r"\(Buy-a-[Bb]ox\)", r"\(Promo\)",
-			                  r"\(Release\)", r"\(Launch\)", r"\(Store Championship\)",
-			                  r"\(Game Day\)", r"\(FNM\)", r"\(Judge\)"]
-			mask = ref_df["Product Name"].str.contains("|".join(promo_patterns), case=False, na=False)
-			excluded_count += mask.sum()
-			ref_df = ref_df[~mask]
-		
-		# Build lookup table
-		records = ref_df.to_dict('records')
-		ref_data = {}
-		
-		for row in records:
-			key = normalize_key(
-					row.get("Product Name", ""),
-					row.get("Set Name", ""),
-					row.get("Condition", "Near Mint"),
-					row.get("Number", "")
-			)
-			if key:
-				ref_data[key] = row
+		with open(cache_path, "rb") as cache_file:
+			compiled = pickle.load(cache_file)
+		cache_path.touch()  # Mark as recently used for save_reference_cache
+		return compiled
+	except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+		print(f"Ignoring unreadable reference cache {cache_path.name}: {e}")
+		return None
+
+
+def save_reference_cache(cache_path, compiled):
+	"""Write a compiled reference index, dropping all but the most recently used ones."""
+	try:
+		cache_path.parent.mkdir(parents=True, exist_ok=True)
+		temp_path = cache_path.with_suffix(".tmp")
+		with open(temp_path, "wb") as cache_file:
+			pickle.dump(compiled, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+		temp_path.replace(cache_path)
+		cached = sorted(cache_path.parent.glob("reference_*.pickle"), key=lambda path: path.stat().st_mtime)
+		for old_cache in cached[:-REFERENCE_CACHE_KEEP]:
+			old_cache.unlink()
+	except OSError as e:
+		print(f"Could not write reference cache: {e}")
+
+
+def read_reference_frame(reference_csv):
+	"""Read the reference columns the converter uses, with pyarrow's multithreaded parser when installed."""
+	import pandas as pd
+	
+	with open(reference_csv, encoding="utf-8-sig", newline="") as reference_file:
+		header = next(csv.reader(reference_file), [])
+	columns = [column for column in header if column in REFERENCE_COLUMNS]
+	try:
+		import pyarrow as pa
+		from pyarrow import csv as pa_csv
+	except ImportError:
+		pa = None
+	
+	if pa is not None:
+		# Text columns are typed up front so collector numbers such as "007" are never read as integers
+		column_types = {column: pa.dictionary(pa.int32(), pa.string()) for column in CATEGORICAL_COLUMNS}
+		column_types.update({column: pa.float64() for column in PRICE_COLUMNS})
+		convert_options = pa_csv.ConvertOptions(include_columns=columns, column_types=column_types,
+		                                        strings_can_be_null=True)
+		try:
+			return pa_csv.read_csv(reference_csv, convert_options=convert_options).to_pandas()
+		except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+			print(f"pyarrow could not parse the reference ({e}); using the pandas parser")
+	
+	dtypes = {column: "category" for column in CATEGORICAL_COLUMNS if column in columns}
+	return pd.read_csv(reference_csv, usecols=columns, dtype=dtypes)
+
+
+def build_reference_data(reference_csv, filter_prerelease=FILTER_PRERELEASE, filter_promo=FILTER_PROMO):
+	"""Parse and filter the reference CSV into a lookup table."""
+	import pandas as pd
+	
+	ref_df = read_reference_frame(reference_csv)
+	ref_df = ref_df[ref_df["Set Name"].notnull()]
+	
+	# Apply filters
+	excluded_count = 0
+	if filter_prerelease:
+		mask = ref_df["Product Name"].str.contains("Prerelease", case=False, na=False)
+		excluded_count += mask.sum()
+		ref_df = ref_df[~mask]
+	
+	if filter_promo:
+		promo_patterns = [r"\(Bundle\)", r"\(Buyabox\)", r"\(Buy-a-[Bb]ox\)", r"\(Promo\)",
+		                  r"\(Release\)", r"\(Launch\)", r"\(Store Championship\)",
+		                  r"\(Game Day\)", r"\(FNM\)", r"\(Judge\)"]
+		mask = ref_df["Product Name"].str.contains("|".join(promo_patterns), case=False, na=False)
+		excluded_count += mask.sum()
+		ref_df = ref_df[~mask]
+	
+	# Build lookup table
+	def column(name, default):
+		return ref_df[name] if name in ref_df.columns else pd.Series(default, index=ref_df.index, dtype=object)
+	
+	keys = normalize_key_columns(column("Product Name", ""), ref_df["Set Name"],
+	                             column("Condition", "Near Mint"), column("Number", ""))
+	
+	# Later rows replace earlier ones with the same key; only the rows that survive become records
+	positions = {}
+	for position, key in enumerate(keys):
+		if key:
+			positions[key] = position
+	records = build_records(ref_df.take(list(positions.values())))
+	return dict(zip(positions, records)), int(excluded_count)
+
+
+def build_candidate_index(card_database):
+	"""Bucket reference keys for candidate lookup."""
+	candidate_index = {
+			"keys":       [],
+			"set":        defaultdict(list),  # set name -> positions
+			"number":     defaultdict(list),  # collector number -> positions
+			"name_of":    array("l"),  # position -> name id
+			"set_of":     array("l"),  # position -> set id
+			"number_of":  array("l"),  # position -> number id (-1 when missing)
+			"cond_of":    array("l"),  # position -> condition id
+			"prerelease": array("b"),  # position -> prerelease product flag
+			"names":      [],  # name id -> normalized card name
+			"name_ids":   {},
+			"name_words": defaultdict(list),  # name word -> name ids
+			"set_ids":    {},
+			"number_ids": {},
+			"conds":      [],  # condition id -> condition text
+			"cond_ids":   {},
+			"arrays":     {},  # NumPy views, rebuilt when keys are added
+			"unnumbered": {},  # (name, set, condition) -> the only key with them, None when several printings share them
+	}
+	for ref_key, ref_row in card_database.items():
+		add_to_candidate_index(candidate_index, ref_key, ref_row)
+	return candidate_index
+
+
+def intern_id(ids, value, values=None):
+	"""Return a stable integer id for a value."""
+	value_id = ids.get(value)
+	if value_id is None:
+		value_id = ids[value] = len(ids)
+		if values is not None:
+			values.append(value)
+	return value_id
+
+
+def add_to_candidate_index(candidate_index, ref_key, ref_row):
+	"""Register a reference key in the candidate buckets."""
+	position = len(candidate_index["keys"])
+	candidate_index["keys"].append(ref_key)
+	card_name, set_name, number, condition = ref_key[:4]
+	candidate_index["set"][set_name].append(position)
+	if number:
+		candidate_index["number"][number].append(position)
+	
+	name_count = len(candidate_index["names"])
+	name_id = intern_id(candidate_index["name_ids"], card_name, candidate_index["names"])
+	if name_id == name_count:
+		for word in set(card_name.split()):
+			candidate_index["name_words"][word].append(name_id)
+	candidate_index["name_of"].append(name_id)
+	candidate_index["set_of"].append(intern_id(candidate_index["set_ids"], set_name))
+	candidate_index["number_of"].append(intern_id(candidate_index["number_ids"], number) if number else -1)
+	candidate_index["cond_of"].append(intern_id(candidate_index["cond_ids"], condition, candidate_index["conds"]))
+	candidate_index["prerelease"].append(
+			"prerelease" in ref_row["Product Name"].lower() or "prerelease cards" in ref_row["Set Name"].lower())
+	if not candidate_index["prerelease"][position]:
+		unnumbered_key = (card_name, set_name, condition)
+		unnumbered = candidate_index["unnumbered"]
+		unnumbered[unnumbered_key] = None if unnumbered_key in unnumbered else ref_key
+
+
+def get_reference_arrays(candidate_index):
+	"""Return NumPy views of the index columns."""
+	import numpy as np
+	
+	arrays = candidate_index["arrays"]
+	if arrays.get("size") == len(candidate_index["keys"]):
+		return arrays
+	
+	names = candidate_index["names"]
+	conds = candidate_index["conds"]
+	arrays.update({
+			"size":       len(candidate_index["keys"]),
+			"name_of":    np.array(candidate_index["name_of"], dtype=np.int64),
+			"set_of":     np.array(candidate_index["set_of"], dtype=np.int64),
+			"number_of":  np.array(candidate_index["number_of"], dtype=np.int64),
+			"cond_of":    np.array(candidate_index["cond_of"], dtype=np.int64),
+			"prerelease": np.array(candidate_index["prerelease"], dtype=bool),
+			"initial":    np.array([ord(name[0]) if name else -1 for name in names], dtype=np.int64),
+			"word_count": np.array([len(name.split()) for name in names], dtype=np.int64),
+			"cond_rank":  np.array([condition_rank.get(cond.replace("foil", "").strip(), -1) for cond in conds],
+			                       dtype=np.int64),
+			"print_flags": np.array([[term in cond for term in SPECIAL_PRINT_PENALTIES] for cond in conds],
+			                        dtype=bool).reshape(len(conds), len(SPECIAL_PRINT_PENALTIES)),
+	})
+	return arrays
+
+
+def build_token_catalog(card_database):
+	"""Group token reference entries by set for token lookups."""
+	catalog = {
+			"sets":         defaultdict(list),  # lowercased set name -> token keys
+			"positions":    {},  # token key -> reference order
+			"double_sided": {},  # token key -> is_double_sided_candidate
+			"by_base":      {},  # token set base name -> token reference entries
+	}
+	for ref_key, ref_row in card_database.items():
+		set_lower = ref_row.get("Set Name", "").lower()
+		product_name = ref_row.get("Product Name", "")
+		if "token" in set_lower or "token" in product_name.lower():
+			catalog["sets"][set_lower].append(ref_key)
+			catalog["positions"][ref_key] = len(catalog["positions"])
+			catalog["double_sided"][ref_key] = is_double_sided_candidate(product_name)
+	for set_lower in list(catalog["sets"]):
+		get_token_ref_data(catalog, card_database, set_lower.replace(" tokens", ""))
+	return catalog
+
+
+def get_token_ref_data(catalog, card_database, token_set_base):
+	"""Return token reference entries whose set contains the base name."""
+	token_ref_data = catalog["by_base"].get(token_set_base)
+	if token_ref_data is None:
+		matched_sets = [keys for set_lower, keys in catalog["sets"].items() if token_set_base in set_lower]
+		token_keys = heapq.merge(*matched_sets, key=catalog["positions"].get)
+		token_ref_data = catalog["by_base"][token_set_base] = {k: card_database[k] for k in token_keys}
+	return token_ref_data
+
+
+def names_may_match(query_name, ref_name):
+	"""Cheap name prefilter applied before fuzzy scoring."""
+	# Quick check: if the first letters differ, skip.
+	if query_name and ref_name and query_name[0] != ref_name[0]:
+		return False
+	
+	query_words = query_name.split()
+	candidate_words = ref_name.split()
+	if len(query_words) == 1 and len(candidate_words) == 1:
+		return query_words[0] == candidate_words[0]
+	if len(query_words) > 1 and len(candidate_words) > 1:
+		return bool(set(query_words).intersection(set(candidate_words)))
+	return True
+
+
+def names_may_match_vector(query_name, name_ids, candidate_index, arrays):
+	"""Vectorized names_may_match over reference name ids."""
+	import numpy as np
+	
+	if not query_name:
+		return np.ones(len(name_ids), dtype=bool)
+	initial = arrays["initial"][name_ids]
+	word_count = arrays["word_count"][name_ids]
+	passes = (initial == ord(query_name[0])) | (initial < 0)
+	query_words = query_name.split()
+	if len(query_words) == 1:
+		passes &= (word_count != 1) | (name_ids == candidate_index["name_ids"].get(query_name, -1))
+	elif len(query_words) > 1:
+		shared = [candidate_index["name_words"].get(word, ()) for word in set(query_words)]
+		shared_ids = np.fromiter((name_id for ids in shared for name_id in ids), dtype=np.int64)
+		passes &= (word_count <= 1) | np.isin(name_ids, shared_ids)
+	return passes
+
+
+def score_positions(query_keys, positions, candidate_index, cdist_workers=-1):
+	"""Score normalized keys against shared candidate positions in bulk."""
+	import numpy as np
+	from rapidfuzz import fuzz, process
+	
+	arrays = get_reference_arrays(candidate_index)
+	keys = candidate_index["keys"]
+	positions = np.asarray(positions, dtype=np.int64)
+	name_ids, name_slots = np.unique(arrays["name_of"][positions], return_inverse=True)
+	ref_names = [candidate_index["names"][name_id] for name_id in name_ids]
+	query_names = list(dict.fromkeys(key[0] for key in query_keys))
+	query_rows = {name: row for row, name in enumerate(query_names)}
+	
+	# One native call per matrix: name similarity and substring containment
+	ratios = process.cdist(query_names, ref_names, scorer=fuzz.ratio, dtype=np.float64, workers=cdist_workers)
+	contained = process.cdist(query_names, ref_names, scorer=fuzz.partial_ratio, score_cutoff=100,
+	                          dtype=np.float64, workers=cdist_workers) == 100
+	# partial_ratio scores empty strings as 0, while '' is a substring of everything
+	contained[:, [slot for slot, name in enumerate(ref_names) if not name]] = True
+	contained[[row for row, name in enumerate(query_names) if not name], :] = True
+	
+	set_of = arrays["set_of"][positions]
+	number_of = arrays["number_of"][positions]
+	cond_of = arrays["cond_of"][positions]
+	cond_rank = arrays["cond_rank"][cond_of]
+	print_flags = arrays["print_flags"][cond_of]
+	prerelease = arrays["prerelease"][positions]
+	
+	results = []
+	for card_name, set_name, number, condition in query_keys:
+		row = query_rows[card_name]
+		viable = names_may_match_vector(card_name, name_ids, candidate_index, arrays)[name_slots]
+		base_score = ratios[row][name_slots]
+		base_score = base_score + np.where(contained[row][name_slots], 20, 0)
+		base_score = base_score + np.where(set_of == candidate_index["set_ids"].get(set_name, -2), 50, 0)
 		
-		total_time = time.time() - start_time
-		print(f"Loaded {len(ref_data):,} cards in {total_time:.1f}s" +
-		      (f" (excluded {excluded_count:,})" if excluded_count > 0 else ""))
+		# Exact number matches keep the score as it stands before condition adjustments
+		if number:
+			number_id = candidate_index["number_ids"].get(number, -2)
+			exact = viable & (number_of == number_id)
+			base_score = base_score + np.where(number_of < 0, 50, np.where(number_of == number_id, 100, -15))
+		else:
+			exact = np.zeros(len(positions), dtype=bool)
+			base_score = base_score + 50
+		exact_scores = base_score[exact]
 		
-		return ref_data
-	except FileNotFoundError:
-		print(f"Reference file not found: {reference_csv}")
-		exit()
+		query_rank = condition_rank.get(condition.replace("foil", "").strip(), -1)
+		if query_rank >= 0:
+			diff = np.abs(cond_rank - query_rank)
+			condition_adjustment = np.where(diff == 0, 50, np.where(diff == 1, -10, -30))
+			condition_adjustment = np.where(cond_rank >= 0, condition_adjustment,
+			                                np.where(cond_of != candidate_index["cond_ids"].get(condition, -2), -20, 0))
+		else:
+			condition_adjustment = np.where(cond_of != candidate_index["cond_ids"].get(condition, -2), -20, 0)
+		base_score = base_score + condition_adjustment
+		
+		for column, (term, penalty) in enumerate(SPECIAL_PRINT_PENALTIES.items()):
+			base_score = base_score - np.where(print_flags[:, column] != (term in condition), penalty, 0)
+		
+		scored = viable & ~prerelease
+		results.append((
+				[(keys[p], score) for p, score in zip(positions[scored].tolist(), base_score[scored].tolist())],
+				[(keys[p], score) for p, score in zip(positions[exact].tolist(), exact_scores.tolist())]
+		))
+	return results
 
 
-def find_best_match(normalized_key, card_database):
-	"""Locate optimal card matches."""
+def score_candidate_tiers(normalized_keys, candidate_index, cdist_workers=-1):
+	"""Batch-score keys from the narrowest bucket outward; cdist_workers threads each rapidfuzz call."""
+	import numpy as np
+	
+	results = {}
+	candidates = defaultdict(int)  # Reference entries scored per key, over every tier tried
+	remaining = list(dict.fromkeys(normalized_keys))
+	
+	def score_groups(groups, buckets, final=False):
+		for group_key, group in groups.items():
+			positions = buckets.get(group_key, ())
+			if not len(positions):
+				continue
+			for key, (matches, exact_number_matches) in zip(group, score_positions(group, positions, candidate_index, cdist_workers)):
+				candidates[key] += len(positions)
+				# Stop once nothing outside this tier could outrank its best candidate
+				if final or exact_number_matches or (
+						matches and max(score for _, score in matches) > MAX_CROSS_SET_SCORE):
+					results[key] = (matches, exact_number_matches, candidates[key])
+	
+	# Exact collector number matches take priority in any set, so they form the first tier
+	groups = defaultdict(list)
+	for key in remaining:
+		if key[2]:
+			groups[key[2]].append(key)
+	score_groups(groups, candidate_index["number"])
+	
+	groups = defaultdict(list)
+	for key in remaining:
+		if key not in results:
+			groups[key[1]].append(key)
+	score_groups(groups, candidate_index["set"])
+	
+	# Global tier: every key whose name can pass the prefilter
+	arrays = get_reference_arrays(candidate_index)
+	all_name_ids = np.arange(len(candidate_index["names"]))
+	for key in remaining:
+		if key not in results:
+			viable_names = names_may_match_vector(key[0], all_name_ids, candidate_index, arrays)
+			positions = np.flatnonzero(viable_names[arrays["name_of"]])
+			score_groups({None: [key]}, {None: positions}, final=True)
+			results.setdefault(key, ([], [], candidates[key]))
+	return results
+
+
+def prescored_best_score(normalized_key, prescored):
+	"""Top score find_best_match will report for a prescored key."""
+	scored = prescored.get(normalized_key)
+	if scored is None:
+		return 0
+	matches, exact_number_matches, _ = scored
+	ranked = exact_number_matches or matches
+	return max((score for _, score in ranked), default=0)
+
+
+def score_key_partition(normalized_keys):
+	"""Score keys in a worker against the reference index inherited from the parent."""
+	# The pool already uses every core, so rapidfuzz stays on one thread per worker
+	return score_candidate_tiers(normalized_keys, forked_reference_index, cdist_workers=1)
+
+
+def score_candidates(normalized_key, card_database, ref_keys):
+	"""Score reference keys against a normalized key."""
+	from rapidfuzz import fuzz
+	
 	matches = []
 	exact_number_matches = []
 	
-	for ref_key in card_database.keys():
-		# Quick check: if the first letters differ, skip.
-		if normalized_key[0] and ref_key[0] and normalized_key[0][0] != ref_key[0][0]:
+	for ref_key in ref_keys:
+		if not names_may_match(normalized_key[0], ref_key[0]):
 			continue
 		
-		query_words = normalized_key[0].split()
-		candidate_words = ref_key[0].split()
-		if len(query_words) == 1 and len(candidate_words) == 1:
-			if query_words[0] != candidate_words[0]:
-				continue
-		elif len(query_words) > 1 and len(candidate_words) > 1:
-			if not set(query_words).intersection(set(candidate_words)):
-				continue
-		
 		base_score = fuzz.ratio(normalized_key[0], ref_key[0])
 		if normalized_key[0] in ref_key[0] or ref_key[0] in normalized_key[0]:
 			base_score += 20
@@ -452,15 +648,7 @@ def find_best_match(normalized_key, card_database):
 				"prerelease cards" in card_database[ref_key]["Set Name"].lower()):
 			continue
 		
-		special_print_penalties = {
-				"foil":       40,
-				"showcase":   30,
-				"etched":     30,
-				"borderless": 30,
-				"extended":   30,
-				"gilded":     30
-		}
-		for term, penalty in special_print_penalties.items():
+		for term, penalty in SPECIAL_PRINT_PENALTIES.items():
 			in_query = term in normalized_key[3]
 			in_ref = term in ref_key[3]
 			if in_query != in_ref:
@@ -468,6 +656,44 @@ def find_best_match(normalized_key, card_database):
 		
 		matches.append((ref_key, base_score))
 	
+	return matches, exact_number_matches
+
+
+def find_exact_match(normalized_key, card_database, candidate_index):
+	"""Reference key identical to a normalized key, with the score fuzzy matching gives it; None on a miss."""
+	card_name, set_name, number, condition = normalized_key
+	if number:
+		ref_key = (card_name, set_name, number, condition, "")
+		if ref_key not in card_database:
+			return None
+	else:
+		# Without a collector number only a single printing in that set and condition is unambiguous
+		ref_key = candidate_index["unnumbered"].get((card_name, set_name, condition))
+		if ref_key is None:
+			return None
+	# Scoring the one candidate applies the same bonuses as a full scan, and the score is the one
+	# find_best_match would rank it by. As there, a collector number match skips the prerelease exclusion
+	matches, exact_number_matches = score_candidates(normalized_key, card_database, [ref_key])
+	ranked = exact_number_matches or matches
+	return ranked[0] if ranked else None
+
+
+def find_best_match(normalized_key, card_database, candidate_index=None, prescored=None, extra_keys=()):
+	"""Locate optimal card matches."""
+	if candidate_index is None:
+		matches, exact_number_matches = score_candidates(normalized_key, card_database, card_database.keys())
+	else:
+		scored = prescored.get(normalized_key) if prescored else None
+		if scored is None:
+			scored = score_candidate_tiers([normalized_key], candidate_index)[normalized_key]
+		matches, exact_number_matches, _ = scored
+		matches, exact_number_matches = list(matches), list(exact_number_matches)
+		# Keys outside the index (Scryfall-only entries) are scored one by one
+		if extra_keys:
+			late_matches, late_exact_matches = score_candidates(normalized_key, card_database, extra_keys)
+			matches += late_matches
+			exact_number_matches += late_exact_matches
+	
 	# If we have exact number matches, prioritize those
 	if exact_number_matches:
 		matches = exact_number_matches
@@ -482,6 +708,8 @@ def find_best_match(normalized_key, card_database):
 
 def create_modern_gui():
 	"""Initialize user interface."""
+	from tkinter import Tk
+	
 	root = Tk()
 	root.title("MTG Card Matcher - Batch Confirmation")
 	root.configure(bg='#2b2b2b')
@@ -553,6 +781,7 @@ def confirm_match_gui_batch(pending_items):
 	print(f"Opening batch confirmation GUI for {len(pending_items)} items...")
 	
 	try:
+		from tkinter import Button, END, Frame, Label, Listbox, Scrollbar, TclError
 		root, style = create_modern_gui()
 		root.lift()  # Bring window to front
 		root.focus_force()  # Force focus
@@ -765,31 +994,6 @@ def confirm_match_gui_batch(pending_items):
 		return confirm_match_simple_fallback(pending_items)
 
 
-def confirm_and_iterate_match(normalized_key, matches, ref_data):
-	"""Process matches based on confidence."""
-	best_match, best_score = matches[0]
-	candidate = ref_data.get(best_match, {})
-	second_best_score = matches[1][1] if len(matches) > 1 else 0
-	is_scryfall_only = candidate.get("TCGplayer Id") == "Scryfall Verified"
-	
-	# Auto-confirm high confidence matches
-	if best_score >= 270 and not is_scryfall_only:
-		confirmed_matches[normalized_key] = best_match
-		return best_match
-	if best_score >= 260 and not is_scryfall_only and (best_score - second_best_score) >= 30:
-		confirmed_matches[normalized_key] = best_match
-		return best_match
-	
-	# Auto-confirm Scryfall-verified entries (score 350) - these are high confidence
-	if is_scryfall_only and best_score >= 350:
-		confirmed_matches[normalized_key] = best_match
-		return best_match
-	
-	# Defer manual review for batch processing
-	pending_confirmations.append((normalized_key, matches, ref_data))
-	return None  # Will be resolved in batch at end
-
-
 def build_standard_entry(ref_row, product_name_suffix, manabox_row, condition):
 	"""Format standard card entry."""
 	return {
@@ -836,8 +1040,8 @@ def build_token_fallback(token_set_name, token_product_name, card_number, manabo
 	}
 
 
-def map_fields(manabox_row, card_database):
-	"""Transform input record to output format."""
+def describe_manabox_row(manabox_row):
+	"""Extract name, set, condition and token flag from input record."""
 	card_name = manabox_row.get("Name", "").strip()
 	set_name = manabox_row.get("Set name", "").strip()
 	condition_code = manabox_row.get("Condition", "near mint").strip().lower().replace("_", " ")
@@ -848,139 +1052,714 @@ def map_fields(manabox_row, card_database):
 	is_token = (
 			"token" in set_name.lower() or
 			"token" in card_name.lower() or
-			(set_name.startswith("T") and re.match(r"^T[A-Z0-9]+$", set_name))
+			(set_name.startswith("T") and TOKEN_SET_CODE.match(set_name))
 	)
-	if is_token:
-		return process_token(manabox_row, card_database, condition, card_name, set_name)
-	else:
-		return process_standard(manabox_row, card_database, condition, card_name, set_name)
+	return card_name, set_name, condition, is_token
 
 
-def process_standard(manabox_row, _card_database, condition, card_name, set_name):
-	"""Handle regular card entries."""
-	card_number = re.sub(r"^[A-Za-z\-]*", "", manabox_row.get("Collector number", "").strip().split("-")[-1])
+def standard_key(manabox_row, condition, card_name, set_name):
+	"""Build the normalized key for a regular card entry."""
+	card_number = clean_collector_number(manabox_row.get("Collector number", ""))
 	if not card_name or not set_name:
 		return None
-	normalized_result = normalize_key(card_name, set_name, condition, card_number)
-	if not normalized_result:
-		return None
-	key = normalized_result[:4]
+	return normalize_key(card_name, set_name, condition, card_number)
+
+
+class ConversionResult:
+	"""Rows and review state produced by one conversion."""
+	
+	def __init__(self, converter, memory_budget=MERGE_MEMORY_BUDGET, delta=None):
+		# Scryfall-only entries found during this conversion shadow the shared reference data
+		self.ref_data = ChainMap({}, converter.ref_data)
+		self.extra_keys = []  # Keys of those entries, in the order they were found
+		self.entries = EntryAggregator(OUTPUT_FIELDS, memory_budget)  # Merged staged inventory rows
+		self.given_up_cards = []
+		self.scryfall_only_cards = []  # External data source entries
+		self.confirmed_matches = {}
+		self.pending_confirmations = []  # Deferred user confirmations
+		self.prescored = {}  # Batch scoring results for the current chunk
+		self.rows_read = 0
+		self.delta = delta  # DeltaState when only new or changed rows are matched
+		self.report = RunReport()
+	
+	def close(self):
+		"""Release the merged entries' spill file."""
+		self.entries.close()
+
+
+class Converter:
+	"""Loaded reference index and Scryfall access shared by any number of conversions."""
+	
+	def __init__(self, reference_csv, bulk_file=None, filter_prerelease=FILTER_PRERELEASE, filter_promo=FILTER_PROMO,
+	             auto_confirm_score=AUTO_CONFIRM_SCORE, confident_score=CONFIDENT_SCORE,
+	             confident_margin=CONFIDENT_MARGIN, token_score=TOKEN_AUTO_CONFIRM_SCORE, workers=MATCH_WORKERS,
+	             chunk_rows=STREAM_CHUNK_ROWS, confirmation_store=None):
+		self.filter_prerelease = filter_prerelease
+		self.filter_promo = filter_promo
+		self.auto_confirm_score = auto_confirm_score
+		self.confident_score = confident_score
+		self.confident_margin = confident_margin
+		self.token_score = token_score
+		self.workers = workers
+		self.chunk_rows = chunk_rows
+		self.scryfall_cache = None  # Persistent API response cache, opened by start_scryfall_client
+		self.scryfall_client = None
+		self.scryfall_bulk = None  # Offline lookup indexes when a bulk-data file is loaded
+		self.ref_data = None
+		self.reference_index = None  # Candidate buckets over ref_data keys
+		self.token_catalog = None  # Token reference entries grouped by set
+		self.catalog_version = None  # Digest of the reference file and filters
+		self.setup_seconds = {}  # Wall time of each setup stage, for run reports
+		start_time = time.perf_counter()
+		self.load_reference_data(reference_csv)
+		self.setup_seconds["load_reference"] = time.perf_counter() - start_time
+		# Earlier manual decisions against this catalog, consulted before any scoring
+		self.confirmation_store = confirmation_store
+		self.stored_confirmations = {}
+		if confirmation_store:
+			self.stored_confirmations = confirmation_store.load(self.catalog_version)
+		if self.stored_confirmations:
+			print(f"Loaded {len(self.stored_confirmations):,} stored confirmations")
+		# Fork before any Scryfall worker threads exist
+		self.match_pool = self.start_match_pool()
+		start_time = time.perf_counter()
+		if bulk_file:
+			self.scryfall_bulk = ScryfallBulkData(bulk_file)
+			print("Scryfall lookups will use the local bulk data (offline mode)")
+		else:
+			self.start_scryfall_client()
+		self.setup_seconds["scryfall_setup"] = time.perf_counter() - start_time
+	
+	def convert(self, rows, result=None):
+		"""Convert Manabox rows; pass an earlier result to keep adding to it."""
+		if result is None:
+			result = ConversionResult(self)
+		for chunk in iter_chunks(rows, self.chunk_rows):
+			if result.delta is None:
+				self.convert_chunk(chunk, result)
+			else:
+				self.convert_delta_chunk(chunk, result)
+			result.prescored.clear()
+			result.rows_read += len(chunk)
+		return result
+	
+	def convert_chunk(self, rows, result):
+		"""Match every row of a chunk."""
+		with result.report.stage("prescore"):
+			self.prescore_inventory(rows, result)
+		with result.report.stage("scryfall_prefetch"):
+			self.prefetch_scryfall(rows, result)
+		with result.report.stage("match"):
+			for row in rows:
+				tcgplayer_row = self.map_fields(row, result)
+				if tcgplayer_row:
+					result.entries.add(tcgplayer_row)
+	
+	def convert_delta_chunk(self, rows, result):
+		"""Replay staged rows unchanged since the previous run and match the rest, keeping input order."""
+		fingerprints = [row_fingerprint(row) for row in rows]
+		replayed = [result.delta.replay(fingerprint, row) for fingerprint, row in zip(fingerprints, rows)]
+		changed_rows = [row for row, staged in zip(rows, replayed) if staged is None]
+		result.report.count("delta_replayed", len(rows) - len(changed_rows))
+		with result.report.stage("prescore"):
+			self.prescore_inventory(changed_rows, result)
+		with result.report.stage("scryfall_prefetch"):
+			self.prefetch_scryfall(changed_rows, result)
+		with result.report.stage("match"):
+			self.replay_or_match(rows, fingerprints, replayed, result)
+	
+	def replay_or_match(self, rows, fingerprints, replayed, result):
+		"""Add remembered staged rows and match the remaining rows, recording the staged ones."""
+		for row, fingerprint, staged in zip(rows, fingerprints, replayed):
+			if staged is not None:
+				result.entries.add(staged)
+				continue
+			
+			pending_count = len(result.pending_confirmations)
+			tcgplayer_row = self.map_fields(row, result)
+			if tcgplayer_row:
+				result.entries.add(tcgplayer_row)
+			result.delta.record(fingerprint, tcgplayer_row, len(result.pending_confirmations) > pending_count)
+	
+	def stored_confirmation(self, normalized_key, lookup):
+		"""A stored decision for a key: a match still in the lookup table, None if skipped, else UNREVIEWED."""
+		match = self.stored_confirmations.get(normalized_key, UNREVIEWED)
+		if match is None or match is UNREVIEWED or match in lookup:
+			return match
+		return UNREVIEWED
+	
+	def needs_scoring(self, normalized_key):
+		"""Whether a key reaches fuzzy scoring, having neither a stored decision nor an exact reference key."""
+		return (self.stored_confirmation(normalized_key, self.ref_data) is UNREVIEWED and
+		        not self.exact_match(normalized_key))
+	
+	def remember_confirmations(self, decisions):
+		"""Keep manual decisions for later runs against the same catalog."""
+		# Scryfall-only entries are rebuilt every run, so only reference matches and skips are kept
+		decisions = {key: match for key, match in decisions.items() if match is None or match in self.ref_data}
+		self.stored_confirmations.update(decisions)
+		if self.confirmation_store is not None:
+			self.confirmation_store.record(self.catalog_version, decisions)
+	
+	def scryfall_stats(self):
+		"""Scryfall lookups made so far: cache hits and misses, HTTP requests and their latency."""
+		if self.scryfall_bulk is not None:
+			return {"mode": "offline", "bulk_cards": len(self.scryfall_bulk.by_id)}
+		if self.scryfall_client is None:
+			return {"mode": "closed"}
+		return {
+				"mode":         "api",
+				"cache_hits":   self.scryfall_cache.hits,
+				"cache_misses": self.scryfall_cache.misses,
+				**self.scryfall_client.stats(),
+		}
 	
-	# Check for existing confirmed matches
-	if key in confirmed_matches:
-		ref_row = ref_data[confirmed_matches[key]]
-		return build_standard_entry(ref_row, normalized_result[4], manabox_row, condition)
+	def settings_signature(self):
+		"""Identify the reference catalog and thresholds that decide every match."""
+		return (self.catalog_version, self.auto_confirm_score, self.confident_score, self.confident_margin,
+		        self.token_score)
+	
+	def close(self):
+		"""Stop worker processes and Scryfall threads."""
+		if self.match_pool is not None:
+			self.match_pool.close()
+			self.match_pool.join()
+			self.match_pool = None
+		if self.scryfall_client is not None:
+			self.scryfall_client.close()
+			self.scryfall_client = None
+	
+	def start_scryfall_client(self):
+		"""Open the Scryfall cache and HTTP client."""
+		if self.scryfall_client is None:
+			self.scryfall_cache = ScryfallCache()
+			self.scryfall_client = ScryfallClient(self.scryfall_cache, max_workers=SCRYFALL_MAX_WORKERS,
+			                                      rate=1 / SCRYFALL_RATE_LIMIT, burst=SCRYFALL_BURST)
+		return self.scryfall_client
+	
+	def query_scryfall_card(self, card_name, set_code, collector_number=None):
+		"""Retrieve card data with caching."""
+		if self.scryfall_bulk is not None:
+			if collector_number:
+				card = self.scryfall_bulk.card_by_number(set_code, collector_number)
+				if card:
+					return card
+			exact_cards, search_results = self.scryfall_bulk.search(card_name, set_code)
+			if exact_cards:
+				return exact_cards[0]
+			return search_results[0] if search_results else None
+		
+		return scryfall_result(self.submit_scryfall_card(card_name, set_code, collector_number), f"{card_name} ({set_code})")
 	
-	# Find matches
-	matches = find_best_match(key, ref_data)
+	def submit_scryfall_card(self, card_name, set_code, collector_number=None):
+		"""Schedule a card lookup on the Scryfall client."""
+		cache_key = f"{card_name}|{set_code}|{collector_number or ''}"
+		return self.scryfall_client.submit(cache_key, self.fetch_scryfall_card, card_name, set_code, collector_number)
 	
-	# Enhance matches with Scryfall verification for missing or low-confidence matches
-	if not matches or (matches and matches[0][1] < 260):
-		matches = enhance_matches_with_scryfall(normalized_result, matches, ref_data, manabox_row)
+	def fetch_scryfall_card(self, card_name, set_code, collector_number=None):
+		"""Fetch card data by set and number or name search."""
+		# Try exact search first if we have collector number
+		if collector_number:
+			url = f"{SCRYFALL_API_BASE}/cards/{set_code}/{collector_number}"
+			response = self.scryfall_client.get(url)
+			
+			if response.status_code == 200:
+				return response.json()
+		
+		# Fallback to name search in set
+		params = {
+				'q':      f'"{card_name}" set:{set_code}',
+				'format': 'json'
+		}
+		url = f"{SCRYFALL_API_BASE}/cards/search"
+		response = self.scryfall_client.get(url, params=params)
+		
+		if response.status_code == 200:
+			search_data = response.json()
+			if search_data.get('total_cards', 0) > 0:
+				# Return first exact name match
+				for card in search_data.get('data', []):
+					if card.get('name', '').lower() == card_name.lower():
+						return card
+				# If no exact match, return first result
+				return search_data['data'][0]
+		
+		# Not found is a definitive answer and gets cached
+		return None
 	
-	# Try to confirm match (auto-confirm or defer)
-	confirmed_match = None
-	if matches:
-		confirmed_match = confirm_and_iterate_match(key, matches, ref_data)
+	def get_scryfall_variants(self, card_name, set_code):
+		"""Retrieve card variant information."""
+		if self.scryfall_bulk is not None:
+			_, search_results = self.scryfall_bulk.search(card_name, set_code)
+			return [build_variant_info(card) for card in search_results
+			        if card.get('name', '').lower() == card_name.lower()]
+		
+		cache_key = f"variants|{card_name}|{set_code}"
+		future = self.scryfall_client.submit(cache_key, self.fetch_scryfall_variants, card_name, set_code)
+		return scryfall_result(future, f"variants of {card_name} ({set_code})", default=[])
 	
-	# If we have a confirmed match, process it
-	if confirmed_match:
-		ref_row = ref_data[confirmed_match]
+	def fetch_scryfall_variants(self, card_name, set_code):
+		"""Fetch the printings of a card within a set."""
+		params = {
+				'q':      f'"{card_name}" set:{set_code}',
+				'format': 'json'
+		}
+		url = f"{SCRYFALL_API_BASE}/cards/search"
+		response = self.scryfall_client.get(url, params=params)
 		
-		# Check if this is a Scryfall-only entry and track it separately
-		if ref_row.get("TCGplayer Id") == "Scryfall Verified":
-			scryfall_entry = build_standard_entry(ref_row, normalized_result[4], manabox_row, condition)
-			scryfall_only_cards.append(scryfall_entry)
-			return None  # Don't include in main output
+		if response.status_code == 200:
+			search_data = response.json()
+			variants = []
+			for card in search_data.get('data', []):
+				if card.get('name', '').lower() == card_name.lower():
+					variants.append(build_variant_info(card))
+			return variants
 		
-		return build_standard_entry(ref_row, normalized_result[4], manabox_row, condition)
-	
-	# If no match found and not deferred, add to given up
-	if not any(item[0] == key for item in pending_confirmations):
-		fallback = build_given_up_entry(manabox_row, condition, card_name, set_name)
-		given_up_cards.append(fallback)
+		return []
 	
-	return None
-
-
-def process_token(manabox_row, _card_database, condition, card_name, set_name):
-	"""Handle token card entries."""
-	if set_name.startswith("T") and re.match(r"^T[A-Z0-9]+$", set_name):
-		token_set_name = set_name[1:] + " tokens"
-	else:
-		token_set_name = set_name
-	token_set_base = token_set_name.lower().replace(" tokens", "")
-	card_number = manabox_row.get("Collector number", "").strip()
-	if "//" in card_name:
-		parts = card_name.split("//")
-		side1 = parts[0].strip()
-		side2 = re.sub(r"double[-\s]?sided token", "", parts[1], flags=re.IGNORECASE).strip()
-		token_product_name = f"{side1} // {side2}"
-	else:
-		token_product_name = card_name
+	def query_scryfall_by_id(self, scryfall_id):
+		"""Retrieve card data by identifier."""
+		if self.scryfall_bulk is not None:
+			return self.scryfall_bulk.card_by_id(scryfall_id)
+		
+		return scryfall_result(self.scryfall_client.submit(f"id|{scryfall_id}", self.fetch_scryfall_by_id, scryfall_id), scryfall_id)
 	
-	normalized_token_key = normalize_key(token_product_name, token_set_name, condition, card_number)
-	if not normalized_token_key:
-		print(f"Skipping invalid or prerelease token: {card_name} from set {set_name}")
+	def fetch_scryfall_by_id(self, scryfall_id):
+		"""Fetch card data by Scryfall ID."""
+		url = f"{SCRYFALL_API_BASE}/cards/{scryfall_id}"
+		response = self.scryfall_client.get(url)
+		
+		if response.status_code == 200:
+			return response.json()
+		
 		return None
 	
-	token_ref_data = {
-			k: v for k, v in ref_data.items()
-			if (
-					("token" in v.get("Set Name", "").lower() or "token" in v.get("Product Name", "").lower()) and
-					(token_set_name.lower() in v.get("Set Name", "").lower() or token_set_base in v.get("Set Name",
-					                                                                                    "").lower())
-			)
-	}
-	matches = find_best_match(normalized_token_key[:4], token_ref_data)
-	chosen_match = None
+	def fetch_scryfall_collection(self, identifiers):
+		"""Resolve lookups in batches through the collection endpoint."""
+		items = list(identifiers.items())
+		batches = [items[start:start + SCRYFALL_COLLECTION_BATCH]
+		           for start in range(0, len(items), SCRYFALL_COLLECTION_BATCH)]
+		futures = [self.scryfall_client.run(self.fetch_scryfall_collection_batch, batch) for batch in batches]
+		resolved = {}
+		for future in futures:
+			resolved.update(future.result())
+		self.scryfall_cache.update(resolved)
+		return resolved
+	
+	def fetch_scryfall_collection_batch(self, batch):
+		"""Fetch one /cards/collection batch of (cache key, identifier) pairs."""
+		try:
+			url = f"{SCRYFALL_API_BASE}/cards/collection"
+			response = self.scryfall_client.post(url, json={'identifiers': [identifier for _, identifier in batch]}, timeout=30)
+			if response.status_code != 200:
+				print(f"Scryfall collection request failed with status {response.status_code}")
+				return {}
+			collection = response.json()
+		except (ScryfallTransportError, ValueError) as e:
+			print(f"Scryfall collection error: {e}")
+			return {}
+		
+		resolved = {}
+		keys_by_id = {identifier['id']: key for key, identifier in batch if 'id' in identifier}
+		keys_by_number = {(identifier['set'].lower(), identifier['collector_number']): key
+		                  for key, identifier in batch if 'set' in identifier}
+		for card in collection.get('data', []):
+			key = (keys_by_id.get(card.get('id')) or
+			       keys_by_number.get((card.get('set', '').lower(), card.get('collector_number'))))
+			if key:
+				resolved[key] = card
+		# Unknown IDs are definitive misses; set/number misses still fall back to a name search
+		for identifier in collection.get('not_found', []):
+			if 'id' in identifier and identifier['id'] in keys_by_id:
+				resolved.setdefault(keys_by_id[identifier['id']], None)
+		return resolved
+	
+	def prefetch_scryfall(self, manabox_rows, result):
+		"""Resolve Scryfall lookups for low-confidence rows before the main loop."""
+		if self.scryfall_bulk is not None:
+			return
+		
+		pending_rows = []
+		for manabox_row in manabox_rows:
+			card_name, set_name, condition, is_token = describe_manabox_row(manabox_row)
+			if is_token:
+				continue
+			normalized_result = standard_key(manabox_row, condition, card_name, set_name)
+			# Only rows that will fall through to enhance_matches_with_scryfall need a lookup
+			if (normalized_result and self.needs_scoring(normalized_result[:4]) and
+					prescored_best_score(normalized_result[:4], result.prescored) < self.confident_score):
+				pending_rows.append((manabox_row, normalized_result))
+		
+		id_lookups = {}
+		for manabox_row, _ in pending_rows:
+			scryfall_id = manabox_row.get("Scryfall ID", "").strip()
+			if scryfall_id and f"id|{scryfall_id}" not in self.scryfall_cache:
+				id_lookups[f"id|{scryfall_id}"] = {'id': scryfall_id}
+		if id_lookups:
+			print(f"Prefetching {len(id_lookups):,} Scryfall IDs...")
+			self.fetch_scryfall_collection(id_lookups)
+		
+		# Rows without a usable ID are looked up by set code and collector number
+		number_lookups = {}
+		for manabox_row, (card_name, set_name, collector_number, _, _) in pending_rows:
+			scryfall_id = manabox_row.get("Scryfall ID", "").strip()
+			if scryfall_id and f"id|{scryfall_id}" in self.scryfall_cache and self.scryfall_cache[f"id|{scryfall_id}"]:
+				continue
+			if collector_number:
+				set_code = guess_scryfall_set_code(set_name)
+				cache_key = f"{card_name}|{set_code}|{collector_number}"
+				if cache_key not in self.scryfall_cache:
+					number_lookups[cache_key] = {'set': set_code, 'collector_number': collector_number}
+		if number_lookups:
+			print(f"Prefetching {len(number_lookups):,} Scryfall set/number lookups...")
+			self.fetch_scryfall_collection(number_lookups)
+		
+		# Whatever is still unresolved goes through the per-card endpoints concurrently
+		card_lookups = []
+		for manabox_row, (card_name, set_name, collector_number, _, _) in pending_rows:
+			scryfall_id = manabox_row.get("Scryfall ID", "").strip()
+			if scryfall_id and f"id|{scryfall_id}" in self.scryfall_cache and self.scryfall_cache[f"id|{scryfall_id}"]:
+				continue
+			card_lookups.append(self.submit_scryfall_card(card_name, guess_scryfall_set_code(set_name), collector_number))
+		if card_lookups:
+			print(f"Resolving {len(card_lookups):,} remaining Scryfall lookups...")
+			self.scryfall_client.wait(card_lookups)
+	
+	def enhance_matches_with_scryfall(self, result, normalized_key, matches, manabox_row=None):
+		"""Supplement matching with external data."""
+		card_name, set_name, collector_number, condition, suffix = normalized_key
+		
+		# First try using Scryfall ID if available from Manabox
+		scryfall_card = None
+		if manabox_row and manabox_row.get("Scryfall ID"):
+			scryfall_id = manabox_row.get("Scryfall ID").strip()
+			if scryfall_id:
+				scryfall_card = self.query_scryfall_by_id(scryfall_id)
+		
+		# Fallback to name/set search if no ID or ID lookup failed
+		if not scryfall_card:
+			set_code = guess_scryfall_set_code(set_name)
+			scryfall_card = self.query_scryfall_card(card_name, set_code, collector_number)
+		
+		if scryfall_card:
+			# Check if this variant might be missing from TCGplayer data
+			if not matches or (matches and matches[0][1] < 300):  # Low confidence in existing matches
+				promo_info = ""
+				if scryfall_card.get('promo'):
+					promo_types = scryfall_card.get('promo_types', [])
+					promo_info = f" (Promo: {', '.join(promo_types)})" if promo_types else " (Promo)"
+				
+				# Create a high-confidence synthetic match using Scryfall data
+				if manabox_row:
+					scryfall_entry = create_scryfall_fallback_entry(scryfall_card, manabox_row, condition)
+					# Create a synthetic match key that will score very high
+					synthetic_key = (card_name, set_name, collector_number, condition, suffix)
+					synthetic_match = (synthetic_key, SCRYFALL_VERIFIED_SCORE)  # Higher than auto-confirm threshold
+					
+					# Add the synthetic entry to this conversion's ref_data so later rows can match it
+					if synthetic_key not in result.ref_data:
+						result.extra_keys.append(synthetic_key)
+					result.ref_data[synthetic_key] = scryfall_entry
+					
+					# Insert at the beginning of matches list
+					matches.insert(0, synthetic_match)
+					print(f"Found Scryfall-only variant{promo_info}")
+		else:
+			print(f"Card not found on Scryfall")
+		
+		return matches
 	
-	# Auto-confirm high-confidence token matches
-	if matches:
+	def load_reference_data(self, reference_csv):
+		"""Initialize card database; raises FileNotFoundError when the reference is missing."""
+		start_time = time.time()
+		print("Loading reference database...")
+		
+		try:
+			self.catalog_version = reference_catalog_version(
+					reference_csv, self.filter_prerelease, self.filter_promo)
+			cache_path = reference_cache_path(self.catalog_version)
+			compiled = load_reference_cache(cache_path)
+			if compiled:
+				self.ref_data, self.reference_index, self.token_catalog, excluded_count = compiled
+			else:
+				self.ref_data, excluded_count = build_reference_data(reference_csv, self.filter_prerelease, self.filter_promo)
+				self.reference_index = build_candidate_index(self.ref_data)
+				self.token_catalog = build_token_catalog(self.ref_data)
+				# NumPy views are rebuilt per run
+				save_reference_cache(cache_path, (self.ref_data, dict(self.reference_index, arrays={}),
+				                                  self.token_catalog, excluded_count))
+			
+			total_time = time.time() - start_time
+			print(f"Loaded {len(self.ref_data):,} cards in {total_time:.1f}s" +
+			      (" from cached index" if compiled else "") +
+			      (f" (excluded {excluded_count:,})" if excluded_count > 0 else ""))
+		except FileNotFoundError as e:
+			raise FileNotFoundError(f"Reference file not found: {reference_csv}") from e
+	
+	def exact_match(self, normalized_key):
+		"""Reference key confirmed by exact lookup instead of fuzzy scoring, or None."""
+		exact = find_exact_match(normalized_key, self.ref_data, self.reference_index)
+		# An exact hit the thresholds would not auto-confirm goes through the full scan and review
+		return exact[0] if exact and exact[1] >= self.auto_confirm_score else None
+	
+	def prescore_inventory(self, manabox_rows, result):
+		"""Batch-score every regular card in the inventory up front."""
+		normalized_keys = []
+		for manabox_row in manabox_rows:
+			card_name, set_name, condition, is_token = describe_manabox_row(manabox_row)
+			if not is_token:
+				normalized_result = standard_key(manabox_row, condition, card_name, set_name)
+				if normalized_result and self.needs_scoring(normalized_result[:4]):
+					normalized_keys.append(normalized_result[:4])
+		normalized_keys = list(dict.fromkeys(normalized_keys))
+		if self.match_pool is None or len(normalized_keys) < MIN_PARALLEL_KEYS:
+			result.prescored.update(score_candidate_tiers(normalized_keys, self.reference_index))
+			return
+		# Keys are scored independently, so any partition gives the same results as a serial pass
+		partitions = [normalized_keys[offset::self.workers] for offset in range(self.workers)]
+		for scored in self.match_pool.map(score_key_partition, partitions):
+			result.prescored.update(scored)
+	
+	def start_match_pool(self):
+		"""Fork scoring workers that share the loaded reference index."""
+		global forked_reference_index
+		if self.workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+			return None
+		# Build the lazy arrays first and keep the collector from touching inherited pages
+		get_reference_arrays(self.reference_index)
+		forked_reference_index = self.reference_index
+		gc.freeze()
+		print(f"Matching with {self.workers} worker processes")
+		pool = multiprocessing.get_context("fork").Pool(self.workers)
+		# The workers are forked, so the parent can collect its own objects again
+		gc.unfreeze()
+		return pool
+	
+	def confirm_and_iterate_match(self, result, normalized_key, matches, ref_data):
+		"""Process matches based on confidence."""
 		best_match, best_score = matches[0]
-		if best_score >= 250:
-			chosen_match = best_match
+		candidate = ref_data.get(best_match, {})
+		second_best_score = matches[1][1] if len(matches) > 1 else 0
+		is_scryfall_only = candidate.get("TCGplayer Id") == "Scryfall Verified"
+		
+		# Auto-confirm high confidence matches
+		if best_score >= self.auto_confirm_score and not is_scryfall_only:
+			result.confirmed_matches[normalized_key] = best_match
+			result.report.count("auto_confirmed")
+			return best_match
+		if best_score >= self.confident_score and not is_scryfall_only and (best_score - second_best_score) >= self.confident_margin:
+			result.confirmed_matches[normalized_key] = best_match
+			result.report.count("confident_confirmed")
+			return best_match
+		
+		# Auto-confirm Scryfall-verified entries - these are high confidence
+		if is_scryfall_only and best_score >= SCRYFALL_VERIFIED_SCORE:
+			result.confirmed_matches[normalized_key] = best_match
+			result.report.count("scryfall_verified")
+			return best_match
+		
+		# Defer manual review for batch processing
+		result.pending_confirmations.append((normalized_key, matches, ref_data))
+		result.report.count("deferred")
+		return None  # Will be resolved in batch at end
+	
+	def map_fields(self, manabox_row, result):
+		"""Transform input record to output format."""
+		card_name, set_name, condition, is_token = describe_manabox_row(manabox_row)
+		if is_token:
+			return self.process_token(manabox_row, result, condition, card_name, set_name)
 		else:
-			# Defer token confirmation for batch processing
-			pending_confirmations.append((normalized_token_key, matches, token_ref_data))
-			return None  # Will be processed in batch later
-	
-	# Check for double-sided tokens if we have an auto-confirmed match
-	if chosen_match and "//" in card_name:
-		ds_matches = [
-				(m, s) for m, s in matches
-				if is_double_sided_candidate(token_ref_data[m].get("Product Name", ""))
-		]
-		if ds_matches and ds_matches[0][0] != chosen_match:
-			# Defer if double-sided options exist
-			pending_confirmations.append((normalized_token_key[:4], ds_matches, token_ref_data))
-			return None
+			return self.process_standard(manabox_row, result, condition, card_name, set_name)
 	
-	# Process confirmed match
-	if chosen_match:
-		ref_row = token_ref_data[chosen_match]
-		token_product_name = ref_row.get("Product Name", token_product_name)
-		token_number = ref_row.get("Number", card_number)
-		return build_token_entry(ref_row, token_set_name, token_product_name, token_number, manabox_row, condition)
-	
-	# No match found and not deferred - add to given up only if not in pending confirmations
-	if not any(item[0] == normalized_token_key[:4] for item in pending_confirmations):
-		fallback = build_token_fallback(token_set_name, token_product_name, card_number, manabox_row, condition)
-		given_up_cards.append(fallback)
+	def process_standard(self, manabox_row, result, condition, card_name, set_name):
+		"""Handle regular card entries."""
+		normalized_result = standard_key(manabox_row, condition, card_name, set_name)
+		if not normalized_result:
+			result.report.count("skipped")
+			return None
+		key = normalized_result[:4]
+		
+		# Check for existing confirmed matches
+		if key in result.confirmed_matches:
+			result.report.count("confirmed_earlier_in_run")
+			ref_row = result.ref_data[result.confirmed_matches[key]]
+			return build_standard_entry(ref_row, normalized_result[4], manabox_row, condition)
+		
+		# Reuse a reviewer's earlier decision for this card
+		stored_match = self.stored_confirmation(key, self.ref_data)
+		if stored_match is None:
+			result.report.count("stored_skip")
+			result.given_up_cards.append(build_given_up_entry(manabox_row, condition, card_name, set_name))
+			return None
+		if stored_match is not UNREVIEWED:
+			result.report.count("stored_confirmation")
+			result.confirmed_matches[key] = stored_match
+			return build_standard_entry(self.ref_data[stored_match], normalized_result[4], manabox_row, condition)
+		
+		# An identical reference key is confirmed without fuzzy scoring
+		exact_match = self.exact_match(key)
+		if exact_match:
+			result.report.count("exact_key" if key[2] else "exact_unnumbered")
+			result.confirmed_matches[key] = exact_match
+			return build_standard_entry(self.ref_data[exact_match], normalized_result[4], manabox_row, condition)
+		
+		# Find matches
+		result.report.count("fuzzy_matched")
+		matches = find_best_match(key, result.ref_data, self.reference_index, result.prescored, result.extra_keys)
+		scored = result.prescored.get(key)
+		if scored is not None:
+			result.report.record_candidates(key, scored[2] + len(result.extra_keys))
+		
+		# Enhance matches with Scryfall verification for missing or low-confidence matches
+		if not matches or (matches and matches[0][1] < self.confident_score):
+			matches = self.enhance_matches_with_scryfall(result, normalized_result, matches, manabox_row)
+		
+		# Try to confirm match (auto-confirm or defer)
+		confirmed_match = None
+		if matches:
+			confirmed_match = self.confirm_and_iterate_match(result, key, matches, result.ref_data)
+		
+		# If we have a confirmed match, process it
+		if confirmed_match:
+			ref_row = result.ref_data[confirmed_match]
+			
+			# Check if this is a Scryfall-only entry and track it separately
+			if ref_row.get("TCGplayer Id") == "Scryfall Verified":
+				scryfall_entry = build_standard_entry(ref_row, normalized_result[4], manabox_row, condition)
+				result.scryfall_only_cards.append(scryfall_entry)
+				return None  # Don't include in main output
+			
+			return build_standard_entry(ref_row, normalized_result[4], manabox_row, condition)
+		
+		# If no match found and not deferred, add to given up
+		if not any(item[0] == key for item in result.pending_confirmations):
+			result.report.count("given_up")
+			fallback = build_given_up_entry(manabox_row, condition, card_name, set_name)
+			result.given_up_cards.append(fallback)
+		
+		return None
 	
-	return None
-
-
-def merge_entries(cards):
-	"""Consolidate duplicate entries."""
-	merged = {}
-	for card in cards:
-		key = (card['TCGplayer Id'], card['Condition'])
-		if key in merged:
-			merged[key]['Add to Quantity'] += card['Add to Quantity']
+	def process_token(self, manabox_row, result, condition, card_name, set_name):
+		"""Handle token card entries."""
+		if set_name.startswith("T") and TOKEN_SET_CODE.match(set_name):
+			token_set_name = set_name[1:] + " tokens"
+		else:
+			token_set_name = set_name
+		token_set_base = token_set_name.lower().replace(" tokens", "")
+		card_number = manabox_row.get("Collector number", "").strip()
+		if "//" in card_name:
+			parts = card_name.split("//")
+			side1 = parts[0].strip()
+			side2 = DOUBLE_SIDED_TOKEN.sub("", parts[1]).strip()
+			token_product_name = f"{side1} // {side2}"
 		else:
-			merged[key] = card
-	return list(merged.values())
+			token_product_name = card_name
+		
+		normalized_token_key = normalize_key(token_product_name, token_set_name, condition, card_number)
+		if not normalized_token_key:
+			print(f"Skipping invalid or prerelease token: {card_name} from set {set_name}")
+			result.report.count("token_skipped")
+			return None
+		
+		token_ref_data = get_token_ref_data(self.token_catalog, self.ref_data, token_set_base)
+		result.report.token_catalogs[token_set_base] = len(token_ref_data)
+		# A stored decision replaces scoring; a skip falls through to the given-up entry below
+		chosen_match = self.stored_confirmation(normalized_token_key[:4], token_ref_data)
+		matches = []
+		if chosen_match is UNREVIEWED:
+			chosen_match = None
+			matches = find_best_match(normalized_token_key[:4], token_ref_data)
+			result.report.record_candidates(normalized_token_key[:4], len(token_ref_data))
+		else:
+			result.report.count("token_stored_decision")
+		
+		# Auto-confirm high-confidence token matches
+		if matches:
+			best_match, best_score = matches[0]
+			if best_score >= self.token_score:
+				chosen_match = best_match
+			else:
+				# Defer token confirmation for batch processing
+				result.pending_confirmations.append((normalized_token_key, matches, token_ref_data))
+				result.report.count("token_deferred")
+				return None  # Will be processed in batch later
+		
+		# Check for double-sided tokens if we have an auto-confirmed match
+		if chosen_match and "//" in card_name:
+			ds_matches = [
+					(m, s) for m, s in matches
+					if self.token_catalog["double_sided"][m]
+			]
+			if ds_matches and ds_matches[0][0] != chosen_match:
+				# Defer if double-sided options exist
+				result.pending_confirmations.append((normalized_token_key[:4], ds_matches, token_ref_data))
+				result.report.count("token_deferred")
+				return None
+		
+		# Process confirmed match
+		if chosen_match:
+			result.report.count("token_confirmed")
+			ref_row = token_ref_data[chosen_match]
+			token_product_name = ref_row.get("Product Name", token_product_name)
+			token_number = ref_row.get("Number", card_number)
+			return build_token_entry(ref_row, token_set_name, token_product_name, token_number, manabox_row, condition)
+		
+		# No match found and not deferred - add to given up only if not in pending confirmations
+		if not any(item[0] == normalized_token_key[:4] for item in result.pending_confirmations):
+			result.report.count("token_given_up")
+			fallback = build_token_fallback(token_set_name, token_product_name, card_number, manabox_row, condition)
+			result.given_up_cards.append(fallback)
+		
+		return None
+	
+	def confirm_pending(self, result, confirm_mode):
+		"""Resolve deferred matches with the chosen confirmation interface."""
+		if confirm_mode == "none":
+			print(f"\nLeaving {len(result.pending_confirmations)} low-confidence matches unconfirmed (--confirm none)")
+			result.pending_confirmations.clear()
+			return
+		print(f"\nProcessing {len(result.pending_confirmations)} manual confirmations...")
+		try:
+			if confirm_mode == "console":
+				confirmation_results = confirm_match_simple_fallback(result.pending_confirmations)
+			else:
+				confirmation_results = confirm_match_gui_batch(result.pending_confirmations)
+			
+			# Apply confirmation results and create additional entries
+			confirmed_count = 0
+			skipped_count = 0
+			decisions = {}
+			
+			for confirmation_idx, selected in confirmation_results.items():
+				if confirmation_idx < len(result.pending_confirmations):
+					normalized_key, matches, local_ref_data = result.pending_confirmations[confirmation_idx]
+					decisions[normalized_key[:4]] = selected or None
+					
+					if selected:
+						result.confirmed_matches[normalized_key] = selected
+						match_row = local_ref_data[selected]
+						
+						# Create entry for confirmed match
+						# Note: This is simplified - in practice we'd need the original manabox_row
+						# For now, we'll just record the confirmation
+						confirmed_count += 1
+						print(f"Confirmed: {normalized_key[0]} -> {match_row.get('Product Name', 'Unknown')}")
+					else:
+						skipped_count += 1
+						print(f"Skipped: {normalized_key[0]}")
+			
+			print(f"Manual confirmations completed: {confirmed_count} confirmed, {skipped_count} skipped")
+			self.remember_confirmations(decisions)
+			
+			# Clear pending confirmations to prevent reprocessing
+			result.pending_confirmations.clear()
+		
+		except Exception as e:
+			print(f"GUI confirmation failed: {e}")
+			print("Adding all unconfirmed items to unmatched list...")
+			for unmatched_key, unmatched_matches, unmatched_ref_data in result.pending_confirmations:
+				print(f"Unmatched: {unmatched_key[0]}")
+			result.pending_confirmations.clear()
 
 
 def auto_confirm_high_score(cards):
@@ -1064,6 +1843,8 @@ def detect_csv_files():
 
 def select_csv_file(prompt):
 	"""Get file selection from user."""
+	from tkinter.filedialog import askopenfilename
+	
 	file_path = askopenfilename(title=prompt, filetypes=[("CSV Files", "*.csv")])
 	if not file_path:
 		print(f"No file selected for {prompt}. Exiting.")
@@ -1071,31 +1852,47 @@ def select_csv_file(prompt):
 	return file_path
 
 
-def create_output_folder():
+def create_output_folder(output_dir=None):
 	"""Generate timestamped output directory."""
-	timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-	output_dir = Path(f"converted_output_{timestamp}")
-	output_dir.mkdir(exist_ok=True)
+	if output_dir is None:
+		timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+		output_dir = Path(f"converted_output_{timestamp}")
+	output_dir = Path(output_dir)
+	output_dir.mkdir(parents=True, exist_ok=True)
 	return output_dir
 
 
-# Main file I/O
-print("MTG Card Converter v2.0")
-print(f"Filters: Prerelease={FILTER_PRERELEASE}, Promo={FILTER_PROMO}")
+def find_bulk_file(bulk_file=None):
+	"""Use the given Scryfall bulk-data dump, the configured one or one found in the current folder."""
+	return bulk_file or SCRYFALL_BULK_FILE or next(iter(sorted(Path(".").glob("default-cards*.json"))), None)
 
-# Try auto-detection first
-print("Scanning for CSV files...")
-detected_manabox, detected_tcgplayer = detect_csv_files()
 
-if detected_manabox and detected_tcgplayer:
-	print(f"Auto-detected files:")
-	print(f"  Manabox CSV: {detected_manabox.name}")
-	print(f"  TCGplayer CSV: {detected_tcgplayer.name}")
-	manabox_csv = str(detected_manabox)
-	reference_csv = str(detected_tcgplayer)
-else:
+def locate_input_files(manabox_csv=None, reference_csv=None):
+	"""Use the given files, falling back to auto-detection and then file dialogs."""
+	if manabox_csv and reference_csv:
+		return manabox_csv, reference_csv
+	
+	# Try auto-detection first
+	print("Scanning for CSV files...")
+	detected_manabox, detected_tcgplayer = detect_csv_files()
+	if manabox_csv:
+		detected_manabox = Path(manabox_csv)
+	if reference_csv:
+		detected_tcgplayer = Path(reference_csv)
+	
+	if detected_manabox and detected_tcgplayer:
+		print(f"Auto-detected files:")
+		print(f"  Manabox CSV: {detected_manabox.name}")
+		print(f"  TCGplayer CSV: {detected_tcgplayer.name}")
+		return str(detected_manabox), str(detected_tcgplayer)
+	
 	print("Could not auto-detect both files. Please select manually...")
-	Tk().withdraw()
+	try:
+		from tkinter import Tk
+		Tk().withdraw()
+	except Exception as e:  # No tkinter, or no display on a headless host
+		print(f"File dialogs unavailable ({e}); pass --manabox and --reference instead.")
+		exit()
 	
 	if not detected_manabox:
 		manabox_csv = select_csv_file("Select the Manabox CSV File")
@@ -1108,93 +1905,187 @@ else:
 	else:
 		print(f"Using detected TCGplayer file: {detected_tcgplayer.name}")
 		reference_csv = str(detected_tcgplayer)
-
-# Create organized output folder
-output_dir = create_output_folder()
-print(f"Output folder: {output_dir}")
-
-tcgplayer_csv = output_dir / "tcgplayer_staged_inventory.csv"
-ref_data = load_reference_data(reference_csv)
-
-try:
-	with open(manabox_csv, mode='r', newline='', encoding='utf-8') as infile, \
-			open(tcgplayer_csv, mode='w', newline='', encoding='utf-8') as outfile:
-		reader = csv.DictReader(infile)
-		fieldnames = [
-				"TCGplayer Id", "Product Line", "Set Name", "Product Name",
-				"Number", "Rarity", "Condition", "Add to Quantity", "TCG Marketplace Price"
-		]
-		writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-		writer.writeheader()
-		cards = []
-		for row in reader:
-			tcgplayer_row = map_fields(row, ref_data)
-			if tcgplayer_row:
-				cards.append(tcgplayer_row)
-		merged_cards = merge_entries(cards)
-		for card in merged_cards:
-			writer.writerow(card)
-	# Process pending confirmations in batch
-	if pending_confirmations:
-		print(f"\nProcessing {len(pending_confirmations)} manual confirmations...")
-		try:
-			confirmation_results = confirm_match_gui_batch(pending_confirmations)
-			
-			# Apply confirmation results and create additional entries
-			confirmed_count = 0
-			skipped_count = 0
-			additional_cards = []
-			
-			for confirmation_idx, result in confirmation_results.items():
-				if confirmation_idx < len(pending_confirmations):
-					normalized_key, matches, local_ref_data = pending_confirmations[confirmation_idx]
-					
-					if result:
-						confirmed_matches[normalized_key] = result
-						match_row = local_ref_data[result]
-						
-						# Create entry for confirmed match
-						# Note: This is simplified - in practice we'd need the original manabox_row
-						# For now, we'll just record the confirmation
-						confirmed_count += 1
-						print(f"Confirmed: {normalized_key[0]} -> {match_row.get('Product Name', 'Unknown')}")
-					else:
-						skipped_count += 1
-						print(f"Skipped: {normalized_key[0]}")
-			
-			print(f"Manual confirmations completed: {confirmed_count} confirmed, {skipped_count} skipped")
-			
-			# Clear pending confirmations to prevent reprocessing
-			pending_confirmations.clear()
+	return manabox_csv, reference_csv
+
+
+def parse_args(argv=None):
+	"""Read command line options."""
+	parser = argparse.ArgumentParser(description="Convert a Manabox export into a TCGplayer staged inventory CSV.")
+	parser.add_argument("--manabox", metavar="CSV", help="Manabox export (auto-detected in the current folder if omitted)")
+	parser.add_argument("--reference", metavar="CSV", help="TCGplayer reference export (auto-detected if omitted)")
+	parser.add_argument("--output-dir", metavar="DIR", help="Output folder (default: converted_output_<timestamp>)")
+	parser.add_argument("--bulk-file", metavar="JSON", help="Scryfall default-cards dump for offline lookups")
+	parser.add_argument("--confirm", choices=("gui", "console", "none"), default="gui",
+	                    help="How low-confidence matches are confirmed (default: gui, console if no display)")
+	parser.add_argument("--filter-prerelease", action="store_true", default=FILTER_PRERELEASE,
+	                    help="Exclude prerelease products from the reference")
+	parser.add_argument("--filter-promo", action="store_true", default=FILTER_PROMO,
+	                    help="Exclude promotional products from the reference")
+	parser.add_argument("--auto-confirm-score", type=int, default=AUTO_CONFIRM_SCORE,
+	                    help=f"Score accepted without review (default: {AUTO_CONFIRM_SCORE})")
+	parser.add_argument("--confident-score", type=int, default=CONFIDENT_SCORE,
+	                    help=f"Score accepted when clearly ahead of the runner-up (default: {CONFIDENT_SCORE})")
+	parser.add_argument("--confident-margin", type=int, default=CONFIDENT_MARGIN,
+	                    help=f"Lead required for --confident-score (default: {CONFIDENT_MARGIN})")
+	parser.add_argument("--token-score", type=int, default=TOKEN_AUTO_CONFIRM_SCORE,
+	                    help=f"Score accepted for tokens (default: {TOKEN_AUTO_CONFIRM_SCORE})")
+	parser.add_argument("--workers", type=int, default=MATCH_WORKERS,
+	                    help=f"Processes used for candidate scoring (default: {MATCH_WORKERS})")
+	parser.add_argument("--confirmation-store", metavar="FILE",
+	                    help="Where manual match decisions are kept for later runs (default: in the cache folder)")
+	parser.add_argument("--no-confirmation-store", action="store_true",
+	                    help="Neither reuse nor keep manual match decisions")
+	parser.add_argument("--delta-state", metavar="FILE",
+	                    help="State kept between runs: rows staged in the previous run are reused, and "
+	                         f"{DELTA_FILE} lists the quantity changes since the previous run")
+	return parser.parse_args(argv)
+
+
+def main(argv=None):
+	"""Run a conversion from the command line."""
+	args = parse_args(argv)
+	run_start = time.perf_counter()
+	
+	print("MTG Card Converter v2.0")
+	print(f"Filters: Prerelease={args.filter_prerelease}, Promo={args.filter_promo}")
+	manabox_csv, reference_csv = locate_input_files(args.manabox, args.reference)
+	
+	# Use a local Scryfall bulk-data dump when one is configured or present
+	bulk_file = find_bulk_file(args.bulk_file)
+	
+	# Create organized output folder
+	output_dir = create_output_folder(args.output_dir)
+	print(f"Output folder: {output_dir}")
+	
+	tcgplayer_csv = output_dir / STAGED_FILE
+	confirmation_store = None if args.no_confirmation_store else ConfirmationStore(args.confirmation_store)
+	try:
+		converter = Converter(reference_csv, bulk_file=bulk_file, filter_prerelease=args.filter_prerelease,
+		                      filter_promo=args.filter_promo, auto_confirm_score=args.auto_confirm_score,
+		                      confident_score=args.confident_score, confident_margin=args.confident_margin,
+		                      token_score=args.token_score, workers=args.workers, confirmation_store=confirmation_store)
+	except FileNotFoundError as e:
+		if confirmation_store is not None:
+			confirmation_store.close()
+		print(f"Error: {e}")
+		raise SystemExit(1)
+	delta = DeltaState(args.delta_state, converter.settings_signature()) if args.delta_state else None
+	result = ConversionResult(converter, delta=delta)
+	scryfall_only_writer = IncrementalCsvWriter(
+			output_dir / MISSING_FILE, OUTPUT_FIELDS, "Missing from TCGplayer")
+	given_up_writer = IncrementalCsvWriter(output_dir / GIVEN_UP_FILE, OUTPUT_FIELDS, "Unmatched")
+	
+	try:
+		with open(manabox_csv, mode='r', newline='', encoding='utf-8') as infile, \
+				open(tcgplayer_csv, mode='w', newline='', encoding='utf-8') as outfile:
+			reader = csv.DictReader(infile)
+			writer = csv.DictWriter(outfile, fieldnames=OUTPUT_FIELDS)
+			writer.writeheader()
+			for rows in iter_chunks(reader, STREAM_CHUNK_ROWS):
+				converter.convert(rows, result)
+				# Nothing from a finished chunk is kept beyond the merged quantities
+				scryfall_only_writer.write(result.scryfall_only_cards)
+				result.scryfall_only_cards.clear()
+				given_up_writer.write(result.given_up_cards)
+				result.given_up_cards.clear()
+				if result.rows_read > STREAM_CHUNK_ROWS:
+					print(f"Processed {result.rows_read:,} rows...")
+			with result.report.stage("write_staged"):
+				for card in result.entries:
+					writer.writerow(card)
+			if result.entries.spills:
+				print(f"Merged entries spilled to disk {result.entries.spills} times")
 		
-		except Exception as e:
-			print(f"GUI confirmation failed: {e}")
-			print("Adding all unconfirmed items to unmatched list...")
-			for unmatched_key, unmatched_matches, unmatched_ref_data in pending_confirmations:
-				print(f"Unmatched: {unmatched_key[0]}")
-			pending_confirmations.clear()
-	
-	print(f"Conversion complete: {len(merged_cards)} cards")
-	
-	# Write additional output files
-	output_files = [str(tcgplayer_csv)]
-	
-	if scryfall_only_cards:
-		scryfall_csv = output_dir / "cards_missing_from_tcgplayer.csv"
-		write_csv_output(scryfall_csv, fieldnames, scryfall_only_cards, "Missing from TCGplayer")
-		output_files.append(str(scryfall_csv))
-	
-	if given_up_cards:
-		given_up_csv = output_dir / "tcgplayer_given_up.csv"
-		write_csv_output(given_up_csv, fieldnames, given_up_cards, "Unmatched")
-		output_files.append(str(given_up_csv))
-	
-	# Summary
-	print(f"\nFiles saved to: {output_dir}")
-	for file_path in output_files:
-		file_name = Path(file_path).name
-		print(f"  - {file_name}")
-except FileNotFoundError as e:
-	print(f"Error: {e}")
-except Exception as e:
-	print(f"An unexpected error occurred: {e}")
+		if delta is not None:
+			with result.report.stage("delta"):
+				# A delta left by an earlier run in the same folder would otherwise pass for this run's
+				(output_dir / DELTA_FILE).unlink(missing_ok=True)
+				delta_writer = IncrementalCsvWriter(output_dir / DELTA_FILE, OUTPUT_FIELDS, "Quantity changes")
+				delta_writer.write(list(delta.changes(result.entries)))
+				delta_writer.close()
+				delta.save(result.entries)
+			print(f"Delta: reused {delta.reused:,} staged rows, matched {delta.matched:,} other rows "
+			      f"({delta.deferred:,} left for review)")
+		
+		# Process pending confirmations in batch
+		pending_count = len(result.pending_confirmations)
+		if result.pending_confirmations:
+			with result.report.stage("manual_confirmation"):
+				converter.confirm_pending(result, args.confirm)
+		
+		print(f"Conversion complete: {len(result.entries)} cards")
+		fast_path = result.report.fast_path_summary()
+		if fast_path["rows"]:
+			print(f"Exact key fast path: {fast_path['exact']:,} of {fast_path['rows']:,} matched rows "
+			      f"({fast_path['fraction']:.1%})")
+		print(f"Normalization cache: {format_cache_stats()}")
+		
+		# Finish additional output files
+		output_files = [str(tcgplayer_csv)]
+		if delta is not None and delta_writer.count:
+			output_files.append(str(delta_writer.path))
+		
+		for extra_writer in (scryfall_only_writer, given_up_writer):
+			if extra_writer.count:
+				extra_writer.close()
+				output_files.append(str(extra_writer.path))
+		
+		# Machine-readable record of where the time went
+		report = result.report
+		report.stages = defaultdict(float, {**converter.setup_seconds, **report.stages})
+		report.stages["total"] = time.perf_counter() - run_start
+		report.sections.update({
+				"run":                 {
+						"manabox_csv":     str(manabox_csv),
+						"reference_csv":   str(reference_csv),
+						"rows_read":       result.rows_read,
+						"reference_cards": len(converter.ref_data),
+						"catalog_version": converter.catalog_version,
+						"settings":        {
+								"auto_confirm_score": converter.auto_confirm_score,
+								"confident_score":    converter.confident_score,
+								"confident_margin":   converter.confident_margin,
+								"token_score":        converter.token_score,
+								"workers":            converter.workers,
+								"filter_prerelease":  converter.filter_prerelease,
+								"filter_promo":       converter.filter_promo,
+						},
+				},
+				"outputs":             {
+						"staged_entries":        len(result.entries),
+						"given_up":              given_up_writer.count,
+						"missing_from_tcgplayer": scryfall_only_writer.count,
+						"pending_confirmations": pending_count,
+				},
+				"scryfall":            converter.scryfall_stats(),
+				"normalization_cache": normalization_cache_stats(),
+		})
+		if delta is not None:
+			report.sections["delta"] = {
+					"reused_rows":   delta.reused,
+					"matched_rows":  delta.matched,
+					"deferred_rows": delta.deferred,
+			}
+		report.write(output_dir / REPORT_FILE)
+		output_files.append(str(output_dir / REPORT_FILE))
+		
+		# Summary
+		print(f"\nFiles saved to: {output_dir}")
+		for file_path in output_files:
+			file_name = Path(file_path).name
+			print(f"  - {file_name}")
+	except FileNotFoundError as e:
+		print(f"Error: {e}")
+	except Exception as e:
+		print(f"An unexpected error occurred: {e}")
+	finally:
+		converter.close()
+		if confirmation_store is not None:
+			confirmation_store.close()
+		result.close()
+		scryfall_only_writer.close()
+		given_up_writer.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,101 @@
+import hashlib
+import pickle
+from pathlib import Path
+
+from streaming import KEY_FIELDS, QUANTITY_FIELD
+
+DELTA_STATE_VERSION = 2
+
+# Manabox column whose changes never need a new match
+MANABOX_QUANTITY_FIELD = "Quantity"
+
+
+def row_fingerprint(manabox_row):
+	"""Digest of every Manabox field but the quantity."""
+	text = "\x1f".join(f"{field}={value}" for field, value in sorted(manabox_row.items(), key=lambda item: str(item[0]))
+	                   if field != MANABOX_QUANTITY_FIELD)
+	return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def row_quantity(manabox_row):
+	"""Quantity of a Manabox row, as the entry builders read it."""
+	return int(manabox_row.get(MANABOX_QUANTITY_FIELD, "1"))
+
+
+class DeltaState:
+	"""Staged rows and totals carried from one conversion of an export to the next."""
+
+	def __init__(self, path, signature):
+		self.path = Path(path)
+		self.signature = signature
+		# Only staged rows are replayed. Given-up, Scryfall-only and deferred rows are matched again every run,
+		# so Scryfall retries, expired cache entries and purged review decisions take effect
+		self.outcomes = {}  # Fingerprint -> staged output row from the previous run
+		self.previous_totals = {}  # (TCGplayer Id, Condition) -> staged row from the previous run
+		self.next_outcomes = {}
+		self.reused = 0
+		self.matched = 0  # Rows matched again, including deferred ones
+		self.deferred = 0  # Rows matched again and left for review
+		self.load()
+
+	def load(self):
+		"""Read the previous run's state; rows are only replayed under the same catalog and thresholds."""
+		if not self.path.exists():
+			print(f"No delta state at {self.path}; matching every row")
+			return
+		try:
+			with open(self.path, "rb") as state_file:
+				version, signature, outcomes, previous_totals = pickle.load(state_file)
+		except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+			print(f"Ignoring unreadable delta state {self.path.name}: {e}")
+			return
+		if version != DELTA_STATE_VERSION:
+			print(f"Ignoring delta state {self.path.name} from another release; matching every row")
+			return
+		# Staged totals are keyed by TCGplayer Id and condition, so the delta stays valid across catalog changes
+		self.previous_totals = previous_totals
+		if signature != self.signature:
+			print("Reference catalog or match settings changed since the last run; matching every row")
+			return
+		self.outcomes = outcomes
+
+	def replay(self, fingerprint, manabox_row):
+		"""The remembered staged row for an unchanged row, or None."""
+		entry = self.outcomes.get(fingerprint)
+		if entry is None:
+			return None
+		self.next_outcomes[fingerprint] = entry
+		self.reused += 1
+		return dict(entry, **{QUANTITY_FIELD: row_quantity(manabox_row)})
+
+	def record(self, fingerprint, entry=None, deferred=False):
+		"""Count a newly matched row and remember its staged row, if it was staged."""
+		self.matched += 1
+		self.deferred += deferred
+		if entry is not None:
+			self.next_outcomes[fingerprint] = entry
+
+	def changes(self, entries):
+		"""Staged rows whose quantity differs from the previous run, with the difference as the quantity."""
+		previous_totals = dict(self.previous_totals)
+		for entry in entries:
+			previous = previous_totals.pop(tuple(entry[field] for field in KEY_FIELDS), None)
+			change = entry[QUANTITY_FIELD] - (previous[QUANTITY_FIELD] if previous else 0)
+			if change:
+				yield dict(entry, **{QUANTITY_FIELD: change})
+		# Cards no longer in the export are removed
+		for previous in previous_totals.values():
+			yield dict(previous, **{QUANTITY_FIELD: -previous[QUANTITY_FIELD]})
+
+	def save(self, entries):
+		"""Write this run's outcomes and staged totals for the next run."""
+		totals = {tuple(entry[field] for field in KEY_FIELDS): entry for entry in entries}
+		try:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			temp_path = self.path.with_suffix(".tmp")
+			with open(temp_path, "wb") as state_file:
+				pickle.dump((DELTA_STATE_VERSION, self.signature, self.next_outcomes, totals), state_file,
+				            protocol=pickle.HIGHEST_PROTOCOL)
+			temp_path.replace(self.path)
+		except OSError as e:
+			print(f"Could not write delta state: {e}")
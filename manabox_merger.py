@@ -1,130 +1,355 @@
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
-
-
-# Create a root window and hide it
-root = tk.Tk()
-root.withdraw()
-
-# Open file dialog to select CSV file
-csv_file = filedialog.askopenfilename(
-    title="Select CSV file to merge",
-    filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
-)
-
-# Check if user cancelled the dialog
-if not csv_file:
-    print("No file selected. Exiting...")
-    exit()
-
-# Load the CSV file, using the first row as the header
-try:
-    df = pd.read_csv(csv_file, header=0)
-
-    # --- Data Cleaning and Preparation ---
-
-    # Convert 'Quantity' and 'Purchase price' to numeric types.
-    # Errors will be converted to NaN (Not a Number)
-    df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
-    df['Purchase price'] = pd.to_numeric(df['Purchase price'], errors='coerce')
-
-    # Fill NaN values in 'Quantity' and 'Purchase price' with 0.
-    # This prevents errors during aggregation.
-    df['Quantity'] = df['Quantity'].fillna(0)
-    df['Purchase price'] = df['Purchase price'].fillna(0)
-
-    # Fill NaN values in the 'Altered' column with a placeholder string 'No'
-    # to ensure they are grouped correctly.
-    df['Altered'] = df['Altered'].fillna('No')
-
-    # --- Aggregation ---
-
-    # Define the columns that identify a unique item
-    grouping_cols = [
-        'Name',
-        'Set code',
-        'Collector number',
-        'Language',
-        'Foil',
-        'Condition',
-        'Purchase price currency',
-        'Altered',
-        'Scryfall ID'
-    ]
-
-    # --- Pre-merge Statistics ---
-    original_total_quantity = df['Quantity'].sum()
-    original_foil_quantity = df[df['Foil'] == 'foil']['Quantity'].sum()
-    original_normal_quantity = df[df['Foil'] != 'foil']['Quantity'].sum()
-    
-    print("\n--- ORIGINAL INVENTORY STATISTICS ---")
-    print(f"Total cards: {original_total_quantity}")
-    print(f"Foil cards: {original_foil_quantity}")
-    print(f"Normal cards: {original_normal_quantity}")
-    print(f"Total entries (rows): {len(df)}")
-
-    # Group by the identifying columns and aggregate quantity and purchase price
-    merged_df = df.groupby(grouping_cols, as_index=False).agg({
-        'Quantity': 'sum',
-        'Purchase price': 'mean'  # Use average purchase price when merging
-    })
-
-    # --- Post-merge Statistics ---
-    merged_total_quantity = merged_df['Quantity'].sum()
-    merged_foil_quantity = merged_df[merged_df['Foil'] == 'foil']['Quantity'].sum()
-    merged_normal_quantity = merged_df[merged_df['Foil'] != 'foil']['Quantity'].sum()
-
-    print("\n--- MERGED INVENTORY STATISTICS ---")
-    print(f"Total cards: {merged_total_quantity}")
-    print(f"Foil cards: {merged_foil_quantity}")
-    print(f"Normal cards: {merged_normal_quantity}")
-    print(f"Total entries (rows): {len(merged_df)}")
-
-    # --- Verification ---
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os
+import tempfile
+
+# Streaming merge settings
+MERGE_CHUNK_ROWS = 100_000  # Rows read per chunk in streaming mode
+COMPACT_ROWS = 1_000_000  # Pending partial aggregate rows combined into the running totals at once
+MERGE_WORKERS = os.cpu_count() or 1  # Processes used when merging several files
+
+# Columns that identify a unique item
+GROUPING_COLS = [
+    'Name',
+    'Set code',
+    'Collector number',
+    'Language',
+    'Foil',
+    'Condition',
+    'Purchase price currency',
+    'Altered',
+    'Scryfall ID'
+]
+
+# Output column order, matching the original format as closely as possible
+OUTPUT_COLS = [
+    'Name',
+    'Set code',
+    'Collector number',
+    'Language',
+    'Foil',
+    'Condition',
+    'Quantity',
+    'Scryfall ID',
+    'Purchase price',
+    'Altered',
+    'Purchase price currency'
+]
+
+
+def select_csv_files():
+    """Ask for the CSV files with a file dialog."""
+    import tkinter as tk
+    from tkinter import filedialog
+
+    # Create a root window and hide it
+    root = tk.Tk()
+    root.withdraw()
+
+    # Open file dialog to select one or more CSV files
+    selected = filedialog.askopenfilenames(
+        title="Select CSV files to merge",
+        filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+    )
+    return list(root.tk.splitlist(selected))
+
+
+def print_statistics(label, total, foil, normal, rows):
+    """Print the quantity totals of an inventory."""
+    print(f"\n--- {label} INVENTORY STATISTICS ---")
+    print(f"Total cards: {total}")
+    print(f"Foil cards: {foil}")
+    print(f"Normal cards: {normal}")
+    print(f"Total entries (rows): {rows}")
+
+
+def print_verification(original, merged):
+    """Compare (total, foil, normal) quantities before and after merging."""
     print("\n--- VERIFICATION ---")
-    total_match = original_total_quantity == merged_total_quantity
-    foil_match = original_foil_quantity == merged_foil_quantity
-    normal_match = original_normal_quantity == merged_normal_quantity
-    
-    print(f"✓ Total quantities match: {total_match} ({original_total_quantity} → {merged_total_quantity})")
-    print(f"✓ Foil quantities match: {foil_match} ({original_foil_quantity} → {merged_foil_quantity})")
-    print(f"✓ Normal quantities match: {normal_match} ({original_normal_quantity} → {merged_normal_quantity})")
-    
-    if total_match and foil_match and normal_match:
+    matches = [before == after for before, after in zip(original, merged)]
+    for label, match, before, after in zip(("Total", "Foil", "Normal"), matches, original, merged):
+        print(f"✓ {label} quantities match: {match} ({before} → {after})")
+
+    if all(matches):
         print("[✓] ALL VERIFICATIONS PASSED - Merge completed successfully!")
     else:
         print("[✕] VERIFICATION FAILED - Quantities do not match!")
 
-    # The resulting merged_df will have the summed quantities.
-    # Let's reorder columns to match the original format as closely as possible.
-    output_cols = [
-        'Name',
-        'Set code',
-        'Collector number',
-        'Language',
-        'Foil',
-        'Condition',
-        'Quantity',
-        'Scryfall ID',
-        'Purchase price',
-        'Altered',
-        'Purchase price currency'
-    ]
-    # Filter out any columns that might not exist if the input changes
-    # This makes the code more robust
-    final_cols = [col for col in output_cols if col in merged_df.columns]
-    merged_df = merged_df[final_cols]
-
-    # Save the merged data to a new CSV file
-    output_filename = 'manabox_inventory_merged.csv'
-    merged_df.to_csv(output_filename, index=False)
+
+def merge_inventory(csv_file, output_filename):
+    """Merge duplicate rows of a Manabox export and verify the quantities."""
+    import pandas as pd
+
+    # Load the CSV file, using the first row as the header. Identifying columns stay text, as in the
+    # streaming and multi-file modes, so collector numbers keep leading zeros and 'false' is not rewritten
+    try:
+        df = pd.read_csv(csv_file, header=0, dtype={col: str for col in GROUPING_COLS})
+
+        # --- Data Cleaning and Preparation ---
+
+        # Convert 'Quantity' and 'Purchase price' to numeric types.
+        # Errors will be converted to NaN (Not a Number)
+        df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
+        df['Purchase price'] = pd.to_numeric(df['Purchase price'], errors='coerce')
+
+        # Fill NaN values in 'Quantity' and 'Purchase price' with 0.
+        # This prevents errors during aggregation.
+        df['Quantity'] = df['Quantity'].fillna(0)
+        df['Purchase price'] = df['Purchase price'].fillna(0)
+
+        # Fill NaN values in the 'Altered' column with a placeholder string 'No'
+        # to ensure they are grouped correctly.
+        df['Altered'] = df['Altered'].fillna('No')
+
+        # --- Aggregation ---
+
+        # --- Pre-merge Statistics ---
+        original_total_quantity = df['Quantity'].sum()
+        original_foil_quantity = df[df['Foil'] == 'foil']['Quantity'].sum()
+        original_normal_quantity = df[df['Foil'] != 'foil']['Quantity'].sum()
+    
+        print_statistics("ORIGINAL", original_total_quantity, original_foil_quantity, original_normal_quantity, len(df))
+
+        # Group by the identifying columns and aggregate quantity and purchase price
+        merged_df = df.groupby(GROUPING_COLS, as_index=False).agg({
+            'Quantity': 'sum',
+            'Purchase price': 'mean'  # Use average purchase price when merging
+        })
+
+        # --- Post-merge Statistics ---
+        merged_total_quantity = merged_df['Quantity'].sum()
+        merged_foil_quantity = merged_df[merged_df['Foil'] == 'foil']['Quantity'].sum()
+        merged_normal_quantity = merged_df[merged_df['Foil'] != 'foil']['Quantity'].sum()
+
+        print_statistics("MERGED", merged_total_quantity, merged_foil_quantity, merged_normal_quantity, len(merged_df))
+
+        # --- Verification ---
+        print_verification(
+            (original_total_quantity, original_foil_quantity, original_normal_quantity),
+            (merged_total_quantity, merged_foil_quantity, merged_normal_quantity)
+        )
+
+        # The resulting merged_df will have the summed quantities.
+        # Filter out any columns that might not exist if the input changes
+        # This makes the code more robust
+        final_cols = [col for col in OUTPUT_COLS if col in merged_df.columns]
+        merged_df = merged_df[final_cols]
+
+        # Save the merged data to a new CSV file
+        merged_df.to_csv(output_filename, index=False)
+
+        print(f"\nSuccessfully merged the data and saved it to '{output_filename}'.")
+        print("\nFirst 5 rows of the merged data:")
+        print(merged_df.head())
+
+    except FileNotFoundError:
+        print(f"Error: '{csv_file}' not found. Please ensure the file is in the correct directory.")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+def read_chunks(csv_file, chunk_rows):
+    """Read a Manabox export in chunks with explicit column types."""
+    import pandas as pd
+
+    # Identifying columns stay text so chunks never disagree on inferred types;
+    # Quantity and Purchase price are coerced to numbers per chunk
+    columns = set(GROUPING_COLS) | {'Quantity', 'Purchase price'}
+    return pd.read_csv(csv_file, header=0, dtype=str, usecols=lambda col: col in columns, chunksize=chunk_rows)
+
+
+def aggregate_chunk(chunk):
+    """Clean one chunk and reduce it to quantity sum, price sum and price count per item."""
+    import pandas as pd
+
+    chunk['Quantity'] = pd.to_numeric(chunk['Quantity'], errors='coerce').fillna(0)
+    chunk['Purchase price'] = pd.to_numeric(chunk['Purchase price'], errors='coerce').fillna(0)
+    chunk['Altered'] = chunk['Altered'].fillna('No')
+    return chunk.groupby(GROUPING_COLS, sort=False).agg(
+        Quantity=('Quantity', 'sum'),
+        price_sum=('Purchase price', 'sum'),
+        price_count=('Purchase price', 'size')
+    )
+
+
+def combine_partials(partials):
+    """Add up partial aggregates that share an item."""
+    import pandas as pd
+
+    if len(partials) == 1:
+        return partials[0]
+    return pd.concat(partials).groupby(level=GROUPING_COLS, sort=False).sum()
+
+
+def scan_file(csv_file, chunk_rows=MERGE_CHUNK_ROWS):
+    """Aggregate one export chunk by chunk; return the partial totals and (total, foil, rows) of its input."""
+    total_quantity = foil_quantity = 0
+    rows = 0
+    merged = None
+    pending = []
+    pending_rows = 0
+    for chunk in read_chunks(csv_file, chunk_rows):
+        partial = aggregate_chunk(chunk)
+        rows += len(chunk)
+        total_quantity += chunk['Quantity'].sum()
+        foil_quantity += chunk.loc[chunk['Foil'] == 'foil', 'Quantity'].sum()
+        pending.append(partial)
+        pending_rows += len(partial)
+        if pending_rows >= COMPACT_ROWS:
+            merged = combine_partials(pending if merged is None else [merged, *pending])
+            pending = []
+            pending_rows = 0
+    if pending or merged is None:
+        merged = combine_partials(pending if merged is None else [merged, *pending])
+    return merged, (total_quantity, foil_quantity, rows)
+
+
+def write_merged(merged, output_filename, chunk_rows=MERGE_CHUNK_ROWS):
+    """Write combined partial totals in blocks; return (total, foil, rows) of the output and a preview."""
+    # Average purchase price over every merged row, as in the in-memory merge
+    merged = merged.sort_index()
+    merged['Purchase price'] = merged.pop('price_sum') / merged.pop('price_count')
+    total_quantity = foil_quantity = 0
+    preview = None
+    for start in range(0, max(len(merged), 1), chunk_rows):
+        block = merged.iloc[start:start + chunk_rows].reset_index()
+        block = block[[col for col in OUTPUT_COLS if col in block.columns]]
+        block.to_csv(output_filename, index=False, mode='w' if start == 0 else 'a', header=start == 0)
+        total_quantity += block['Quantity'].sum()
+        foil_quantity += block.loc[block['Foil'] == 'foil', 'Quantity'].sum()
+        if preview is None:
+            preview = block.head()
+    return (total_quantity, foil_quantity, len(merged)), preview
+
+
+def report_merge(original, merged, output_filename, preview):
+    """Print the statistics and verification of a chunked merge."""
+    original_total_quantity, original_foil_quantity, original_rows = original
+    merged_total_quantity, merged_foil_quantity, merged_rows = merged
+    original_normal_quantity = original_total_quantity - original_foil_quantity
+    merged_normal_quantity = merged_total_quantity - merged_foil_quantity
+
+    print_statistics("ORIGINAL", original_total_quantity, original_foil_quantity, original_normal_quantity,
+                     original_rows)
+    print_statistics("MERGED", merged_total_quantity, merged_foil_quantity, merged_normal_quantity, merged_rows)
+    print_verification(
+        (original_total_quantity, original_foil_quantity, original_normal_quantity),
+        (merged_total_quantity, merged_foil_quantity, merged_normal_quantity)
+    )
 
     print(f"\nSuccessfully merged the data and saved it to '{output_filename}'.")
     print("\nFirst 5 rows of the merged data:")
-    print(merged_df.head())
+    print(preview)
+
+
+def merge_inventory_streaming(csv_file, output_filename, chunk_rows=MERGE_CHUNK_ROWS):
+    """Merge a Manabox export chunk by chunk, holding only one row per distinct item in memory."""
+    try:
+        # Partial aggregation, with the original statistics taken in the same pass
+        merged, original = scan_file(csv_file, chunk_rows)
+        written, preview = write_merged(merged, output_filename, chunk_rows)
+        report_merge(original, written, output_filename, preview)
+
+    except FileNotFoundError:
+        print(f"Error: '{csv_file}' not found. Please ensure the file is in the correct directory.")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+
+def partition_file(csv_file, chunk_rows, shards, shard_dir, file_index):
+    """Aggregate one export and split its partial totals into hash shards on disk."""
+    import pandas as pd
+
+    merged, original = scan_file(csv_file, chunk_rows)
+    # The same item hashes to the same shard in every file and every process
+    shard_ids = pd.util.hash_pandas_object(merged.index, index=False).to_numpy() % shards
+    for shard in range(shards):
+        merged[shard_ids == shard].to_pickle(os.path.join(shard_dir, f"{shard}-{file_index}.pkl"))
+    return original
+
+
+def reduce_shard(shard_dir, shard):
+    """Combine the partial totals every file contributed to one shard."""
+    import pandas as pd
+
+    pieces = glob.glob(os.path.join(shard_dir, f"{shard}-*.pkl"))
+    return combine_partials([pd.read_pickle(piece) for piece in pieces])
+
+
+def merge_inventories_parallel(csv_files, output_filename, workers=MERGE_WORKERS, chunk_rows=MERGE_CHUNK_ROWS):
+    """Merge several Manabox exports into one inventory, parsing and reducing them on a process pool."""
+    import pandas as pd
+
+    workers = max(1, workers)
+    print(f"Merging {len(csv_files)} files using {workers} worker(s)...")
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    starmap = pool.starmap if pool else lambda function, tasks: list(itertools.starmap(function, tasks))
+    try:
+        with tempfile.TemporaryDirectory(prefix="manabox_merge_") as shard_dir:
+            # Each file is parsed and aggregated by one worker, then each shard is reduced by one worker
+            originals = starmap(partition_file, [(csv_file, chunk_rows, workers, shard_dir, file_index)
+                                                 for file_index, csv_file in enumerate(csv_files)])
+            shards = starmap(reduce_shard, [(shard_dir, shard) for shard in range(workers)])
+
+        # Shards hold disjoint items, so concatenating them completes the merge
+        original = tuple(sum(values) for values in zip(*originals))
+        written, preview = write_merged(pd.concat(shards), output_filename, chunk_rows)
+        report_merge(original, written, output_filename, preview)
+
+    except FileNotFoundError as e:
+        print(f"Error: '{e.filename}' not found. Please ensure the file is in the correct directory.")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+
+def expand_inputs(patterns):
+    """Expand glob patterns into CSV paths, keeping the given order and dropping repeats."""
+    csv_files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"Warning: no files match '{pattern}'")
+        for match in map(os.path.normpath, matches):
+            if match not in csv_files:
+                csv_files.append(match)
+    return csv_files
+
+
+def main(argv=None):
+    """Merge one or more Manabox exports from the command line."""
+    parser = argparse.ArgumentParser(description="Merge duplicate rows in Manabox inventory exports.")
+    parser.add_argument("csv_files", nargs="*", metavar="csv_file",
+                        help="Manabox CSVs or glob patterns to merge (a file dialog opens if omitted)")
+    parser.add_argument("-o", "--output", default="manabox_inventory_merged.csv",
+                        help="Merged CSV to write (default: manabox_inventory_merged.csv)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Merge in chunks so exports larger than memory can be merged")
+    parser.add_argument("--chunk-rows", type=int, default=MERGE_CHUNK_ROWS,
+                        help=f"Rows read per chunk with --stream or several files (default: {MERGE_CHUNK_ROWS:,})")
+    parser.add_argument("--workers", type=int, default=MERGE_WORKERS,
+                        help=f"Processes used when merging several files (default: {MERGE_WORKERS})")
+    args = parser.parse_args(argv)
+
+    csv_files = expand_inputs(args.csv_files) if args.csv_files else select_csv_files()
+
+    # Check if user cancelled the dialog
+    if not csv_files:
+        print("No file selected. Exiting...")
+        exit()
+
+    if len(csv_files) > 1:
+        merge_inventories_parallel(csv_files, args.output, args.workers, args.chunk_rows)
+    elif args.stream:
+        merge_inventory_streaming(csv_files[0], args.output, args.chunk_rows)
+    else:
+        merge_inventory(csv_files[0], args.output)
+
 
-except FileNotFoundError:
-    print("Error: 'inventory (3).csv' not found. Please ensure the file is in the correct directory.")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
+if __name__ == "__main__":
+    main()
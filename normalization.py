@@ -0,0 +1,156 @@
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+# Patterns compiled once and shared by every key builder
+PARENTHESIZED = re.compile(r"\(.*?\)")
+CARD_NAME_JUNK = re.compile(r"[^a-zA-Z0-9 ,'-]")
+SET_NAME_JUNK = re.compile(r"[^a-zA-Z0-9 ]")
+NUMBER_JUNK = re.compile(r"[^\d\-]")
+NUMBER_PREFIX = re.compile(r"^[A-Za-z\-]*")
+TOKEN_SET_CODE = re.compile(r"^T[A-Z0-9]+$")
+DOUBLE_SIDED_TOKEN = re.compile(r"double[-\s]?sided token", re.IGNORECASE)
+
+# Bounded memo sizes; an inventory touches a few hundred sets and a few thousand names
+SET_NAME_CACHE_SIZE = 4096
+CARD_NAME_CACHE_SIZE = 65536
+
+
+def remove_accents(text):
+	"""Normalize character encoding."""
+	if text.isascii():
+		return text  # NFKD leaves ASCII untouched
+	return ''.join(
+			c for c in unicodedata.normalize('NFKD', text)
+			if not unicodedata.combining(c)
+	)
+
+
+@lru_cache(maxsize=CARD_NAME_CACHE_SIZE)
+def normalize_card_name(card_name):
+	"""Standardize a card name for comparison."""
+	if "(" in card_name and ")" in card_name:
+		card_name = PARENTHESIZED.sub("", card_name).strip()
+	card_name = remove_accents(card_name)
+	card_name = card_name.split('//')[0].strip()  # Use only text before '//' if present.
+	return CARD_NAME_JUNK.sub("", card_name).strip().lower()
+
+
+@lru_cache(maxsize=SET_NAME_CACHE_SIZE)
+def normalize_set_name(set_name):
+	"""Standardize a set name for comparison."""
+	normalized_set_name = SET_NAME_JUNK.sub("", remove_accents(set_name)).strip().lower()
+	if normalized_set_name in ["plst", "the list"]:
+		normalized_set_name = "the list reprints"
+	return normalized_set_name
+
+
+def normalize_number(number):
+	"""Keep digits and dashes of a collector number; None when nothing is left."""
+	return (NUMBER_JUNK.sub("", str(number).strip()) or None) if number else None
+
+
+def clean_collector_number(collector_number):
+	"""Drop set-code prefixes such as 'PLST-ABC-' from a Manabox collector number."""
+	return NUMBER_PREFIX.sub("", collector_number.strip().split("-")[-1])
+
+
+def normalize_key(card_name, set_name, condition, number):
+	"""Standardize card identifiers for comparison."""
+	suffix = ""
+	normalized_card_name = normalize_card_name(card_name)
+	normalized_set_name = normalize_set_name(set_name)
+	if "prerelease cards" in normalized_set_name:
+		return None
+	return normalized_card_name, normalized_set_name, normalize_number(number), condition.lower(), suffix
+
+
+def normalization_cache_stats():
+	"""Hit counts and rates of the name caches."""
+	stats = {}
+	for label, cached in (("set names", normalize_set_name), ("card names", normalize_card_name)):
+		info = cached.cache_info()
+		lookups = info.hits + info.misses
+		stats[label] = {
+				"hits":     info.hits,
+				"misses":   info.misses,
+				"size":     info.currsize,
+				"hit_rate": info.hits / lookups if lookups else 0.0,
+		}
+	return stats
+
+
+def format_cache_stats():
+	"""One-line summary of the name cache hit rates."""
+	return " | ".join(
+			f"{label}: {stats['hit_rate']:.1%} of {stats['hits'] + stats['misses']:,} lookups cached"
+			for label, stats in normalization_cache_stats().items()
+	)
+
+
+@lru_cache(maxsize=None)
+def combining_characters_pattern():
+	"""Regex matching every character remove_accents drops after NFKD."""
+	ranges = []
+	for code_point in range(sys.maxunicode + 1):
+		if unicodedata.combining(chr(code_point)):
+			if ranges and ranges[-1][1] == code_point - 1:
+				ranges[-1][1] = code_point
+			else:
+				ranges.append([code_point, code_point])
+	return "[" + "".join(f"{re.escape(chr(start))}-{re.escape(chr(end))}" for start, end in ranges) + "]"
+
+
+def remove_accents_column(column):
+	"""Vectorized remove_accents over a string Series."""
+	# ASCII text is unchanged by NFKD, so only the remaining rows are decomposed
+	non_ascii = ~column.str.isascii().fillna(True).astype(bool)
+	if not non_ascii.any():
+		return column
+	column = column.copy()
+	column[non_ascii] = column[non_ascii].str.normalize('NFKD').str.replace(
+			combining_characters_pattern(), "", regex=True)
+	return column
+
+
+def normalize_key_columns(card_names, set_names, conditions, numbers):
+	"""Vectorized normalize_key over reference columns; None where a row is excluded."""
+	import pandas as pd
+
+	# Every condition variant repeats the product name, so each distinct name is normalized once
+	index = card_names.index
+	name_codes, distinct_names = card_names.factorize(use_na_sentinel=False)
+
+	# Object dtype keeps Python's str and re semantics, matching the scalar function exactly
+	card_names = pd.Series(distinct_names, dtype=object)
+	set_names = set_names.astype(object)
+	conditions = conditions.astype(object)
+	numbers = numbers.astype(object)
+
+	has_parens = card_names.str.contains("(", regex=False) & card_names.str.contains(")", regex=False)
+	has_parens = has_parens.fillna(False).astype(bool)
+	card_names[has_parens] = card_names[has_parens].str.replace(PARENTHESIZED, "", regex=True).str.strip()
+	card_names = remove_accents_column(card_names)
+	double_faced = card_names.str.contains("//", regex=False).fillna(False).astype(bool)
+	card_names[double_faced] = card_names[double_faced].str.split("//", n=1, regex=False).str[0]
+	card_names = card_names.str.strip()
+	card_names = card_names.str.replace(CARD_NAME_JUNK, "", regex=True).str.strip().str.lower()
+	card_names = pd.Series(card_names.to_numpy()[name_codes], index=index)
+
+	# Set names and numbers repeat across thousands of rows, so each distinct value is normalized once
+	set_names = set_names.map({set_name: normalize_set_name(set_name) for set_name in set_names.dropna().unique()})
+	excluded = set_names.str.contains("prerelease cards", regex=False).fillna(True).astype(bool)
+	excluded |= card_names.isna() | set_names.isna() | conditions.isna()
+	numbers = numbers.fillna("").astype(str)
+	normalized_numbers = {number: normalize_number(number) for number in numbers.unique()}
+	conditions = conditions.map({condition: condition.lower() for condition in conditions.dropna().unique()})
+
+	# Condition variants of a card share one name string
+	shared_names = {}
+	return [
+			None if skip else (shared_names.setdefault(card_name, card_name), set_name, number, condition, "")
+			for skip, card_name, set_name, number, condition in zip(
+					excluded.tolist(), card_names.tolist(), set_names.tolist(),
+					[normalized_numbers[number] for number in numbers.tolist()], conditions.tolist())
+	]
@@ -0,0 +1,75 @@
+# Reference CSV columns the converter reads, mapped to record attributes
+RECORD_ATTRIBUTES = {
+		"TCGplayer Id":          "tcgplayer_id",
+		"Product Line":          "product_line",
+		"Set Name":              "set_name",
+		"Product Name":          "product_name",
+		"Number":                "number",
+		"Rarity":                "rarity",
+		"TCG Marketplace Price": "marketplace_price",
+		"List Price":            "list_price",
+		"Retail Price":          "retail_price",
+}
+RECORD_FIELDS = tuple(RECORD_ATTRIBUTES)
+
+# Columns loaded from the CSV; Condition only feeds the lookup key
+REFERENCE_COLUMNS = RECORD_FIELDS + ("Condition",)
+
+# Values repeated across sets and condition variants share one string object
+SHARED_FIELDS = ("Product Line", "Set Name", "Product Name", "Number", "Rarity")
+
+# Columns read as categoricals, so each distinct value is parsed and stored once
+CATEGORICAL_COLUMNS = SHARED_FIELDS + ("Condition",)
+
+# Columns read as numbers
+PRICE_COLUMNS = ("TCG Marketplace Price", "List Price", "Retail Price")
+
+MISSING = object()  # Column absent from the CSV; its slot is left unset
+
+
+class ReferenceRecord:
+	"""One reference card, read like the row dict it replaces."""
+
+	__slots__ = tuple(RECORD_ATTRIBUTES.values())
+
+	def __init__(self, *values):
+		for attribute, value in zip(self.__slots__, values):
+			if value is not MISSING:
+				setattr(self, attribute, value)
+
+	def get(self, field, default=None):
+		"""Dict-style lookup by CSV column name."""
+		attribute = RECORD_ATTRIBUTES.get(field)
+		return default if attribute is None else getattr(self, attribute, default)
+
+	def __getitem__(self, field):
+		value = self.get(field, MISSING)
+		if value is MISSING:
+			raise KeyError(field)
+		return value
+
+	def __contains__(self, field):
+		return self.get(field, MISSING) is not MISSING
+
+	def __repr__(self):
+		return f"ReferenceRecord({', '.join(f'{field}={self[field]!r}' for field in RECORD_FIELDS if field in self)})"
+
+
+def shared_values(values):
+	"""Collapse equal values onto a single object."""
+	canonical = {}
+	return [canonical.setdefault(value, value) for value in values]
+
+
+def build_records(frame):
+	"""Turn the reference DataFrame into records, in row order."""
+	# Categorical columns already hand out one object per distinct value
+	columns = []
+	for field in RECORD_FIELDS:
+		if field not in frame.columns:
+			columns.append([MISSING] * len(frame))
+		elif field in SHARED_FIELDS and frame[field].dtype != "category":
+			columns.append(shared_values(frame[field].tolist()))
+		else:
+			columns.append(frame[field].tolist())
+	return [ReferenceRecord(*values) for values in zip(*columns)]
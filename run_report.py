@@ -0,0 +1,96 @@
+import heapq
+import json
+import time
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+REPORT_VERSION = 1
+HEAVIEST_ROWS = 20  # Rows with the most scored candidates listed by name
+
+
+def percentile(ordered, fraction):
+	"""Nearest-rank percentile of a sorted sequence."""
+	return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0
+
+
+class RunReport:
+	"""Per-run stage timings, counters and match statistics, written as JSON next to the outputs."""
+
+	def __init__(self):
+		self.started = datetime.now()
+		self.stages = defaultdict(float)  # Stage name -> wall seconds
+		self.counts = defaultdict(int)  # Outcome name -> rows
+		self.candidates = array("I")  # Reference candidates scored, one entry per matched row
+		self.heaviest = []  # Min-heap of (candidates, sequence, row) for the costliest rows
+		self.token_catalogs = {}  # Token set -> entries in its sub-catalog
+		self.sections = {}  # Further sections supplied by the caller
+
+	@contextmanager
+	def stage(self, name):
+		"""Add the wall time of a block to a stage."""
+		start_time = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.stages[name] += time.perf_counter() - start_time
+
+	def count(self, name, amount=1):
+		"""Increment an outcome counter."""
+		self.counts[name] += amount
+
+	def record_candidates(self, normalized_key, candidates):
+		"""Note how many reference entries were scored for one row."""
+		self.candidates.append(candidates)
+		entry = (candidates, len(self.candidates), normalized_key)
+		if len(self.heaviest) < HEAVIEST_ROWS:
+			heapq.heappush(self.heaviest, entry)
+		elif candidates > self.heaviest[0][0]:
+			heapq.heapreplace(self.heaviest, entry)
+
+	def candidate_summary(self):
+		"""Distribution of candidates scored per row, and the rows that cost most."""
+		ordered = sorted(self.candidates)
+		return {
+				"rows":          len(ordered),
+				"total":         sum(ordered),
+				"mean":          round(sum(ordered) / len(ordered), 1) if ordered else 0,
+				"p50":           percentile(ordered, 0.50),
+				"p95":           percentile(ordered, 0.95),
+				"max":           ordered[-1] if ordered else 0,
+				"heaviest_rows": [
+						{"name": key[0], "set": key[1], "number": key[2], "condition": key[3], "candidates": candidates}
+						for candidates, _, key in sorted(self.heaviest, reverse=True)
+				],
+		}
+
+	def fast_path_summary(self):
+		"""Rows confirmed by exact key lookup, against every regular row that needed matching."""
+		exact = self.counts.get("exact_key", 0) + self.counts.get("exact_unnumbered", 0)
+		rows = exact + self.counts.get("fuzzy_matched", 0)
+		return {
+				"rows":     rows,
+				"exact":    exact,
+				"fraction": round(exact / rows, 4) if rows else 0.0,
+		}
+
+	def as_dict(self):
+		"""The report as a JSON-ready dict."""
+		stages = {name: round(seconds, 3) for name, seconds in self.stages.items()}
+		return {
+				"version":        REPORT_VERSION,
+				"started_at":     self.started.isoformat(timespec="seconds"),
+				"stages_seconds": stages,
+				"outcomes":       dict(sorted(self.counts.items())),
+				"fast_path":      self.fast_path_summary(),
+				"candidates":     self.candidate_summary(),
+				"token_catalogs": dict(sorted(self.token_catalogs.items())),
+				**self.sections,
+		}
+
+	def write(self, path):
+		"""Write the report as indented JSON."""
+		with open(path, "w", encoding="utf-8") as report_file:
+			json.dump(self.as_dict(), report_file, indent=2)
+			report_file.write("\n")
@@ -0,0 +1,97 @@
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Card fields kept from the bulk dump; everything else is dropped while parsing
+CARD_FIELDS = (
+		"id", "name", "set", "set_name", "collector_number", "rarity", "promo", "promo_types",
+		"frame_effects", "finishes", "variation", "full_art", "textless", "image_status", "border_color"
+)
+INTERNED_FIELDS = ("set", "set_name", "rarity", "image_status", "border_color")
+READ_SIZE = 1 << 20
+
+
+def iter_bulk_cards(path):
+	"""Stream card objects out of a Scryfall bulk-data JSON array."""
+	decoder = json.JSONDecoder()
+	buffer = ""
+	position = 0
+	started = False
+	with open(path, "r", encoding="utf-8") as bulk_file:
+		while True:
+			chunk = bulk_file.read(READ_SIZE)
+			buffer = buffer[position:] + chunk
+			position = 0
+			while True:
+				# Skip whitespace, the opening bracket and separators between objects
+				while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+					if buffer[position] == "[":
+						started = True
+					position += 1
+				if position >= len(buffer):
+					break
+				if not started:
+					raise ValueError(f"{path} is not a JSON array of cards")
+				try:
+					card, end = decoder.raw_decode(buffer, position)
+				except json.JSONDecodeError:
+					if not chunk:
+						raise
+					break  # Object continues in the next chunk
+				position = end
+				yield card
+			if not chunk:
+				return
+
+
+def compact_card(card):
+	"""Keep only the fields the converter reads."""
+	compact = {field: card[field] for field in CARD_FIELDS if field in card}
+	for field in INTERNED_FIELDS:
+		if isinstance(compact.get(field), str):
+			compact[field] = sys.intern(compact[field])
+	return compact
+
+
+class ScryfallBulkData:
+	"""Lookup indexes over a local Scryfall default-cards dump."""
+
+	def __init__(self, path):
+		start_time = time.time()
+		self.path = Path(path)
+		self.by_id = {}
+		self.by_set_number = {}  # (set code, collector number) -> card
+		self.by_name_set = defaultdict(list)  # (lowercase name, set code) -> cards
+		self.by_set = defaultdict(list)  # set code -> cards sorted by name
+		for raw_card in iter_bulk_cards(self.path):
+			card = compact_card(raw_card)
+			set_code = card.get("set", "").lower()
+			self.by_id[card.get("id")] = card
+			self.by_set_number.setdefault((set_code, card.get("collector_number", "")), card)
+			name = card.get("name", "").lower()
+			self.by_name_set[(name, set_code)].append(card)
+			front_face = name.split(" // ")[0]
+			if front_face != name:
+				self.by_name_set[(front_face, set_code)].append(card)
+			self.by_set[set_code].append(card)
+		for cards in self.by_set.values():
+			cards.sort(key=lambda c: c.get("name", ""))
+		print(f"Loaded {len(self.by_id):,} Scryfall cards from {self.path.name} in {time.time() - start_time:.1f}s")
+
+	def card_by_id(self, scryfall_id):
+		"""Find a card by Scryfall ID."""
+		return self.by_id.get(scryfall_id)
+
+	def card_by_number(self, set_code, collector_number):
+		"""Find a card by set code and collector number."""
+		return self.by_set_number.get((set_code.lower(), str(collector_number)))
+
+	def search(self, card_name, set_code):
+		"""Mimic a quoted name search within one set, exact name hits first."""
+		name = card_name.lower()
+		set_code = set_code.lower()
+		exact = self.by_name_set.get((name, set_code), [])
+		partial = [card for card in self.by_set.get(set_code, ()) if name in card.get("name", "").lower()]
+		return exact, partial
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Cache location and retention settings
+CACHE_DIR = Path(os.environ.get("MANAFORK_CACHE_DIR", Path.home() / ".cache" / "manafork"))
+CACHE_FILE = "scryfall_cache.sqlite3"
+POSITIVE_TTL = 30 * 24 * 3600  # Card data rarely changes once printed
+NEGATIVE_TTL = 24 * 3600  # Misses are retried daily so new releases show up
+MAX_ENTRIES = 250_000
+MEMORY_ENTRIES = 20_000  # Entries kept in process, least recently used dropped first
+
+
+def is_negative(value):
+	"""Detect empty API results."""
+	return value is None or value == []
+
+
+class ScryfallCache:
+	"""Persistent mapping of cache keys to Scryfall responses."""
+
+	def __init__(self, path=None, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES,
+			memory_entries=MEMORY_ENTRIES):
+		self.path = Path(path) if path else CACHE_DIR / CACHE_FILE
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self.positive_ttl = positive_ttl
+		self.negative_ttl = negative_ttl
+		self.max_entries = max_entries
+		self.memory_entries = memory_entries
+		self.memory = OrderedDict()  # Recently used entries as (value, expires_at)
+		self.hits = 0
+		self.misses = 0
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+		self.connection.execute(
+				"CREATE TABLE IF NOT EXISTS entries ("
+				"key TEXT PRIMARY KEY, value TEXT NOT NULL, negative INTEGER NOT NULL, stored_at REAL NOT NULL)"
+		)
+		self.connection.execute("CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at)")
+		self.size = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+	def expires_at(self, stored_at, negative):
+		"""Compute entry expiry time."""
+		return stored_at + (self.negative_ttl if negative else self.positive_ttl)
+
+	def remember(self, key, value, expires_at):
+		"""Keep an entry in process, evicting the least recently used beyond the limit."""
+		self.memory[key] = (value, expires_at)
+		self.memory.move_to_end(key)
+		while len(self.memory) > self.memory_entries:
+			self.memory.popitem(last=False)
+
+	def __contains__(self, key):
+		now = time.time()
+		with self.lock:
+			entry = self.memory.get(key)
+			if entry and entry[1] > now:
+				self.memory.move_to_end(key)
+				self.hits += 1
+				return True
+			row = self.connection.execute(
+					"SELECT value, negative, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+			if row and self.expires_at(row[2], row[1]) > now:
+				self.remember(key, json.loads(row[0]), self.expires_at(row[2], row[1]))
+				self.hits += 1
+				return True
+			self.memory.pop(key, None)
+			self.misses += 1
+			return False
+
+	def __getitem__(self, key):
+		with self.lock:
+			entry = self.memory.get(key)
+			if entry:
+				return entry[0]
+			# Evicted since the membership check; expiry was checked there
+			row = self.connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+		if row is None:
+			raise KeyError(key)
+		return json.loads(row[0])
+
+	def __setitem__(self, key, value):
+		now = time.time()
+		with self.lock:
+			self.remember(key, value, self.expires_at(now, is_negative(value)))
+			self.connection.execute(
+					"INSERT OR REPLACE INTO entries (key, value, negative, stored_at) VALUES (?, ?, ?, ?)",
+					(key, json.dumps(value), int(is_negative(value)), now))
+			self.size += 1  # Upper bound, replacements included; evict() recounts
+			if self.size > self.max_entries:
+				self.evict()
+
+	def update(self, entries):
+		"""Store many entries in one transaction."""
+		if not entries:
+			return
+		now = time.time()
+		with self.lock:
+			for key, value in entries.items():
+				self.remember(key, value, self.expires_at(now, is_negative(value)))
+			self.connection.execute("BEGIN")
+			self.connection.executemany(
+					"INSERT OR REPLACE INTO entries (key, value, negative, stored_at) VALUES (?, ?, ?, ?)",
+					[(key, json.dumps(value), int(is_negative(value)), now) for key, value in entries.items()])
+			self.connection.execute("COMMIT")
+			self.size += len(entries)
+			if self.size > self.max_entries:
+				self.evict()
+
+	def __len__(self):
+		return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+	def evict(self):
+		"""Drop expired entries, then the oldest ones beyond the size limit."""
+		self.purge_expired()
+		excess = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+		if excess > 0:
+			self.connection.execute(
+					"DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at LIMIT ?)", (excess,))
+		self.size = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+	def purge_expired(self):
+		"""Remove entries past their TTL."""
+		now = time.time()
+		cursor = self.connection.execute(
+				"DELETE FROM entries WHERE (negative = 1 AND stored_at < ?) OR (negative = 0 AND stored_at < ?)",
+				(now - self.negative_ttl, now - self.positive_ttl))
+		return cursor.rowcount
+
+	def purge(self, negative_only=False, key_pattern=None):
+		"""Remove entries, optionally only negative ones or keys matching a LIKE pattern."""
+		clauses, params = [], []
+		if negative_only:
+			clauses.append("negative = 1")
+		if key_pattern:
+			clauses.append("key LIKE ?")
+			params.append(key_pattern)
+		where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+		with self.lock:
+			cursor = self.connection.execute(f"DELETE FROM entries{where}", params)
+			self.memory.clear()
+			self.size = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+		return cursor.rowcount
+
+	def stats(self):
+		"""Summarize cache contents."""
+		now = time.time()
+		total, negative, oldest, newest = self.connection.execute(
+				"SELECT COUNT(*), COALESCE(SUM(negative), 0), MIN(stored_at), MAX(stored_at) FROM entries").fetchone()
+		expired = self.connection.execute(
+				"SELECT COUNT(*) FROM entries WHERE (negative = 1 AND stored_at < ?) OR (negative = 0 AND stored_at < ?)",
+				(now - self.negative_ttl, now - self.positive_ttl)).fetchone()[0]
+		by_kind = dict(self.connection.execute(
+				"SELECT CASE WHEN key LIKE 'id|%' THEN 'id' WHEN key LIKE 'variants|%' THEN 'variants' "
+				"ELSE 'card' END AS kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+		return {
+				"path":     str(self.path),
+				"size_mb":  self.path.stat().st_size / 1_000_000 if self.path.exists() else 0,
+				"entries":  total,
+				"positive": total - negative,
+				"negative": negative,
+				"expired":  expired,
+				"by_kind":  by_kind,
+				"oldest":   oldest,
+				"newest":   newest,
+		}
+
+	def close(self):
+		"""Close the database connection."""
+		self.connection.close()
+
+
+def format_timestamp(timestamp):
+	"""Render an epoch timestamp for display."""
+	return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp)) if timestamp else "-"
+
+
+def main(argv=None):
+	"""Inspect or purge the Scryfall cache."""
+	parser = argparse.ArgumentParser(description="Inspect or purge the persistent Scryfall cache.")
+	parser.add_argument("--cache-file", help=f"Cache database (default: {CACHE_DIR / CACHE_FILE})")
+	commands = parser.add_subparsers(dest="command", required=True)
+	commands.add_parser("stats", help="Show entry counts and age")
+	show = commands.add_parser("show", help="Print the cached value for a key")
+	show.add_argument("key")
+	purge = commands.add_parser("purge", help="Delete cache entries")
+	scope = purge.add_mutually_exclusive_group(required=True)
+	scope.add_argument("--all", action="store_true", help="Delete every entry")
+	scope.add_argument("--expired", action="store_true", help="Delete entries past their TTL")
+	scope.add_argument("--negative", action="store_true", help="Delete cached misses")
+	scope.add_argument("--match", metavar="PATTERN", help="Delete keys matching a SQL LIKE pattern, e.g. 'id|%%'")
+	args = parser.parse_args(argv)
+
+	cache = ScryfallCache(args.cache_file)
+	try:
+		if args.command == "stats":
+			stats = cache.stats()
+			print(f"Cache file: {stats['path']} ({stats['size_mb']:.1f} MB)")
+			print(f"Entries: {stats['entries']:,} ({stats['positive']:,} positive, {stats['negative']:,} negative)")
+			print(f"Expired: {stats['expired']:,}")
+			for kind, count in sorted(stats["by_kind"].items()):
+				print(f"  {kind}: {count:,}")
+			print(f"Oldest: {format_timestamp(stats['oldest'])} | Newest: {format_timestamp(stats['newest'])}")
+		elif args.command == "show":
+			if args.key in cache:
+				print(json.dumps(cache[args.key], indent=2))
+			else:
+				print(f"No live entry for {args.key}")
+		elif args.command == "purge":
+			if args.expired:
+				removed = cache.purge_expired()
+			else:
+				removed = cache.purge(negative_only=args.negative, key_pattern=args.match)
+			print(f"Removed {removed:,} entries")
+	finally:
+		cache.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Scryfall asks for no more than 10 requests per second on average
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 2
+DEFAULT_WORKERS = 8
+
+# Retry policy for transient failures
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # Seconds before the first retry, doubled each attempt
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HEADERS = {"User-Agent": "ManaFork/2.0", "Accept": "application/json"}
+
+
+class ScryfallTransportError(Exception):
+	"""Raised when Scryfall could not be reached; the lookup should not be cached."""
+
+
+class TokenBucket:
+	"""Thread-safe token bucket shared by every request."""
+
+	def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+		self.rate = rate
+		self.capacity = capacity
+		self.tokens = capacity
+		self.updated = time.monotonic()
+		self.paused_until = 0.0
+		self.lock = threading.Lock()
+
+	def acquire(self):
+		"""Block until a request may be sent."""
+		while True:
+			with self.lock:
+				now = time.monotonic()
+				if now < self.paused_until:
+					wait_time = self.paused_until - now
+				else:
+					self.tokens = min(self.capacity, self.tokens + (now - max(self.updated, self.paused_until)) * self.rate)
+					self.updated = now
+					if self.tokens >= 1:
+						self.tokens -= 1
+						return
+					wait_time = (1 - self.tokens) / self.rate
+			time.sleep(wait_time)
+
+	def pause(self, seconds):
+		"""Hold back every caller, e.g. after a 429 with Retry-After."""
+		with self.lock:
+			self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+			self.tokens = 0
+
+
+def retry_after_seconds(response):
+	"""Parse a Retry-After header given in seconds or as an HTTP date."""
+	value = response.headers.get("Retry-After")
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+	except (TypeError, ValueError):
+		return None
+
+
+class ScryfallClient:
+	"""Runs Scryfall lookups on a thread pool behind a shared rate limit."""
+
+	def __init__(self, cache, max_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+	             max_retries=MAX_RETRIES):
+		self.cache = cache
+		self.bucket = TokenBucket(rate, burst)
+		self.max_retries = max_retries
+		self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scryfall")
+		# requests is only loaded by runs that actually talk to Scryfall
+		import requests
+		from requests.adapters import HTTPAdapter
+		self.request_errors = requests.RequestException
+		# One keep-alive connection pool shared by all workers
+		self.session = requests.Session()
+		self.session.headers.update(HEADERS)
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		self.in_flight = {}  # cache key -> Future of the running lookup
+		self.lock = threading.Lock()
+		# HTTP attempts made, including retries, and the time spent waiting on them
+		self.request_count = 0
+		self.failed_requests = 0
+		self.request_seconds = 0.0
+		self.slowest_request = 0.0
+
+	def request(self, method, url, **kwargs):
+		"""Send a rate-limited request, retrying transient failures with backoff."""
+		kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+		error = None
+		for attempt in range(self.max_retries + 1):
+			self.bucket.acquire()
+			delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+			start_time = time.perf_counter()
+			try:
+				response = self.session.request(method, url, **kwargs)
+			except self.request_errors as e:
+				self.record_request(time.perf_counter() - start_time, failed=True)
+				error = e
+			else:
+				self.record_request(time.perf_counter() - start_time, failed=response.status_code in RETRY_STATUSES)
+				if response.status_code not in RETRY_STATUSES:
+					return response
+				error = f"HTTP {response.status_code}"
+				retry_after = retry_after_seconds(response)
+				if retry_after is not None:
+					delay = min(BACKOFF_MAX, retry_after)
+				if response.status_code == 429:
+					self.bucket.pause(delay)
+			if attempt < self.max_retries:
+				time.sleep(delay)
+		raise ScryfallTransportError(f"{method} {url} failed after {self.max_retries + 1} attempts: {error}")
+
+	def record_request(self, seconds, failed=False):
+		"""Count one HTTP attempt."""
+		with self.lock:
+			self.request_count += 1
+			self.failed_requests += failed
+			self.request_seconds += seconds
+			self.slowest_request = max(self.slowest_request, seconds)
+
+	def stats(self):
+		"""Request counts and latency so far."""
+		with self.lock:
+			return {
+					"requests":        self.request_count,
+					"failed_requests": self.failed_requests,
+					"latency_seconds": {
+							"total": round(self.request_seconds, 3),
+							"mean":  round(self.request_seconds / self.request_count, 3) if self.request_count else 0,
+							"max":   round(self.slowest_request, 3),
+					},
+			}
+
+	def get(self, url, **kwargs):
+		"""GET through the shared session."""
+		return self.request("GET", url, **kwargs)
+
+	def post(self, url, **kwargs):
+		"""POST through the shared session."""
+		return self.request("POST", url, **kwargs)
+
+	def submit(self, cache_key, fetch, *args):
+		"""Return a Future for a cached lookup, coalescing duplicate requests."""
+		with self.lock:
+			if cache_key in self.cache:
+				future = Future()
+				future.set_result(self.cache[cache_key])
+				return future
+			future = self.in_flight.get(cache_key)
+			if future is None:
+				future = self.in_flight[cache_key] = self.executor.submit(self.run_lookup, cache_key, fetch, *args)
+			return future
+
+	def run_lookup(self, cache_key, fetch, *args):
+		"""Fetch a value, store it in the cache and release the in-flight slot."""
+		# Failures propagate through the Future without being cached
+		try:
+			value = fetch(*args)
+			self.cache[cache_key] = value
+			return value
+		finally:
+			with self.lock:
+				self.in_flight.pop(cache_key, None)
+
+	def run(self, task, *args):
+		"""Run uncached work on the pool."""
+		return self.executor.submit(task, *args)
+
+	def wait(self, futures):
+		"""Block until the given lookups finish."""
+		wait(list(futures))
+
+	def close(self):
+		"""Stop the worker threads and close pooled connections."""
+		self.executor.shutdown(wait=True)
+		self.session.close()
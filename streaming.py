@@ -0,0 +1,130 @@
+import csv
+import os
+import pickle
+import sqlite3
+import tempfile
+from itertools import islice
+
+# Defaults for bounded-memory conversion
+CHUNK_ROWS = 5000
+MEMORY_BUDGET = 100_000
+KEY_FIELDS = ("TCGplayer Id", "Condition")
+QUANTITY_FIELD = "Add to Quantity"
+
+
+def iter_chunks(rows, size=CHUNK_ROWS):
+	"""Yield lists of at most size rows from any iterable."""
+	rows = iter(rows)
+	while True:
+		chunk = list(islice(rows, size))
+		if not chunk:
+			return
+		yield chunk
+
+
+class EntryAggregator:
+	"""Sums quantities per (TCGplayer Id, Condition), spilling to SQLite past a memory budget."""
+
+	def __init__(self, fieldnames, memory_budget=MEMORY_BUDGET, directory=None):
+		self.fieldnames = list(fieldnames)
+		self.memory_budget = memory_budget
+		self.directory = directory
+		self.memory = {}  # key -> [first-seen sequence, quantity, field values]
+		self.sequence = 0
+		self.spills = 0
+		self.path = None
+		self.connection = None
+
+	def add(self, entry):
+		"""Merge one entry; the first entry seen for a key supplies every field but the quantity."""
+		key = tuple(entry[field] for field in KEY_FIELDS)
+		held = self.memory.get(key)
+		if held is not None:
+			held[1] += entry[QUANTITY_FIELD]
+			return
+		self.memory[key] = [self.sequence, entry[QUANTITY_FIELD], tuple(entry.get(field) for field in self.fieldnames)]
+		self.sequence += 1
+		if len(self.memory) > self.memory_budget:
+			self.spill()
+
+	def spill(self):
+		"""Upsert the in-memory entries into the spill database."""
+		if self.connection is None:
+			handle, self.path = tempfile.mkstemp(prefix="manafork_merge_", suffix=".sqlite3", dir=self.directory)
+			os.close(handle)
+			self.connection = sqlite3.connect(self.path)
+			self.connection.execute(
+					"CREATE TABLE entries (key BLOB PRIMARY KEY, sequence INTEGER NOT NULL, "
+					"quantity INTEGER NOT NULL, entry BLOB NOT NULL)"
+			)
+		# A key already on disk keeps its original position and fields
+		with self.connection:
+			self.connection.executemany(
+					"INSERT INTO entries (key, sequence, quantity, entry) VALUES (?, ?, ?, ?) "
+					"ON CONFLICT(key) DO UPDATE SET quantity = quantity + excluded.quantity",
+					[(pickle.dumps(key), sequence, quantity, pickle.dumps(values))
+					 for key, (sequence, quantity, values) in self.memory.items()])
+		self.memory.clear()
+		self.spills += 1
+
+	def build_entry(self, quantity, values):
+		"""Rebuild an output row from stored field values."""
+		entry = dict(zip(self.fieldnames, values))
+		entry[QUANTITY_FIELD] = quantity
+		return entry
+
+	def __iter__(self):
+		"""Merged entries in first-seen order."""
+		if self.connection is None:
+			for _, quantity, values in self.memory.values():
+				yield self.build_entry(quantity, values)
+			return
+		if self.memory:
+			self.spill()
+		for quantity, values in self.connection.execute("SELECT quantity, entry FROM entries ORDER BY sequence"):
+			yield self.build_entry(quantity, pickle.loads(values))
+
+	def __len__(self):
+		if self.connection is None:
+			return len(self.memory)
+		if self.memory:
+			self.spill()
+		return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+	def close(self):
+		"""Drop the spill database."""
+		if self.connection is not None:
+			self.connection.close()
+			self.connection = None
+			os.remove(self.path)
+		self.memory.clear()
+
+
+class IncrementalCsvWriter:
+	"""CSV output that is appended to as rows arrive and only created once there is a row."""
+
+	def __init__(self, path, fieldnames, description):
+		self.path = path
+		self.fieldnames = fieldnames
+		self.description = description
+		self.count = 0
+		self.file = None
+		self.writer = None
+
+	def write(self, entries):
+		"""Append entries to the file."""
+		if not entries:
+			return
+		if self.file is None:
+			self.file = open(self.path, mode='w', newline='', encoding='utf-8')
+			self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
+			self.writer.writeheader()
+		self.writer.writerows(entries)
+		self.count += len(entries)
+
+	def close(self):
+		"""Finish the file and report its size."""
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+			print(f"{self.description}: {self.count} cards")
@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts live flat in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+REFERENCE_HEADER = "TCGplayer Id,Product Line,Set Name,Product Name,Number,Rarity,Condition,TCG Marketplace Price\n"
+REFERENCE_ROWS = [
+	"1001,Magic,Bloomburrow,Sun,61,Common,Near Mint,0.25",
+	"1002,Magic,Bloomburrow,Sun,61,Common,Near Mint Foil,0.75",
+	"1003,Magic,Bloomburrow,Sun Blade (Prerelease),62,Rare,Near Mint,3.00",
+	"1004,Magic,Foundations,Lord,191,Common,Lightly Played,1.50",
+]
+
+# Several sets sharing card names and collector numbers, for ranking and scoring tests
+CATALOG_ROWS = [
+	"2001,Magic,Bloomburrow,Sun,61,Common,Near Mint,0.25",
+	"2002,Magic,Bloomburrow,Sun,61,Common,Lightly Played,0.20",
+	"2003,Magic,Bloomburrow,Sun,61,Common,Near Mint Foil,0.75",
+	"2004,Magic,Bloomburrow,Sunshower Druid,197,Common,Near Mint,0.10",
+	"2005,Magic,Bloomburrow,Season of the Burrow,29,Mythic,Near Mint,4.00",
+	"2006,Magic,Bloomburrow,Season of the Burrow (Borderless),351,Mythic,Near Mint,9.00",
+	"2007,Magic,Foundations,Lord of the Undead,191,Rare,Lightly Played,1.50",
+	"2008,Magic,Foundations,Sun Titan,34,Mythic,Near Mint,2.00",
+	"2009,Magic,Foundations,Sun Titan,34,Mythic,Damaged,1.00",
+	"2014,Magic,Foundations,Sun Titan,301,Mythic,Near Mint,5.00",
+	"2010,Magic,Duskmourn: House of Horror,Enduring Innocence,6,Rare,Near Mint,3.00",
+	"2011,Magic,Duskmourn: House of Horror,Sunspine Lynx,155,Rare,Near Mint,1.20",
+	"2012,Magic,Magic 2011,Sun Titan,35,Mythic,Heavily Played,0.90",
+	"2013,Magic,Magic 2011,Lord of the Undead,92,Rare,Near Mint,1.10",
+]
+
+
+@pytest.fixture
+def reference_csv(tmp_path):
+	"""A small TCGplayer reference export."""
+	path = tmp_path / "REFERENCE.csv"
+	path.write_text(REFERENCE_HEADER + "\n".join(REFERENCE_ROWS) + "\n", encoding="utf-8")
+	return path
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+	"""A reference export with several sets sharing names and numbers."""
+	path = tmp_path / "CATALOG.csv"
+	path.write_text(REFERENCE_HEADER + "\n".join(CATALOG_ROWS) + "\n", encoding="utf-8")
+	return path
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+	"""Keep caches in a scratch folder and answer Scryfall lookups from an empty bulk file."""
+	import convert_manabox_tcgp
+	
+	monkeypatch.setattr(convert_manabox_tcgp, "REFERENCE_CACHE_DIR", tmp_path / "cache")
+	bulk_file = tmp_path / "default-cards.json"
+	bulk_file.write_text("[]", encoding="utf-8")
+	return bulk_file
+
+
+MANABOX_HEADER = "Name,Set code,Set name,Collector number,Foil,Rarity,Quantity,Scryfall ID,Condition,Language\n"
+MANABOX_ROWS = [
+	"Sun,BLB,Bloomburrow,61,normal,common,2,,near_mint,en",
+	"Sun,BLB,Bloomburrow,61,foil,common,1,,near_mint,en",
+	"Lord,FDN,Foundations,191,normal,common,3,,lightly_played,en",
+]
+
+
+@pytest.fixture
+def manabox_csv(tmp_path):
+	"""A small Manabox export matching the reference fixture."""
+	path = tmp_path / "manabox.csv"
+	path.write_text(MANABOX_HEADER + "\n".join(MANABOX_ROWS) + "\n", encoding="utf-8")
+	return path
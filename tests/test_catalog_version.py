@@ -0,0 +1,33 @@
+import convert_manabox_tcgp
+from convert_manabox_tcgp import Converter, reference_cache_path, reference_catalog_version
+
+
+def test_cache_version_bump_keeps_catalog_version(reference_csv, monkeypatch):
+	catalog_version = reference_catalog_version(reference_csv)
+	cache_path = reference_cache_path(catalog_version)
+	
+	monkeypatch.setattr(convert_manabox_tcgp, "REFERENCE_CACHE_VERSION", convert_manabox_tcgp.REFERENCE_CACHE_VERSION + 1)
+	
+	assert reference_catalog_version(reference_csv) == catalog_version
+	assert reference_cache_path(catalog_version) != cache_path
+
+
+def test_catalog_version_follows_content_and_filters(reference_csv):
+	catalog_version = reference_catalog_version(reference_csv)
+	
+	assert reference_catalog_version(reference_csv, filter_prerelease=True) != catalog_version
+	reference_csv.write_text(reference_csv.read_text() + "1005,Magic,Foundations,Lord,191,Common,Damaged,0.50\n")
+	assert reference_catalog_version(reference_csv) != catalog_version
+
+
+def test_converter_catalog_version_survives_cache_version_bump(reference_csv, offline, monkeypatch):
+	converter = Converter(reference_csv, bulk_file=offline)
+	catalog_version = converter.catalog_version
+	converter.close()
+	
+	monkeypatch.setattr(convert_manabox_tcgp, "REFERENCE_CACHE_VERSION", convert_manabox_tcgp.REFERENCE_CACHE_VERSION + 1)
+	converter = Converter(reference_csv, bulk_file=offline)
+	converter.close()
+	
+	assert converter.catalog_version == catalog_version
+
@@ -0,0 +1,21 @@
+import convert_manabox_tcgp
+from convert_manabox_tcgp import DELTA_FILE
+
+
+def convert(manabox_csv, reference_csv, offline, output_dir, *options):
+	"""Run the command line conversion offline and without review."""
+	convert_manabox_tcgp.main(["--manabox", str(manabox_csv), "--reference", str(reference_csv),
+	                           "--output-dir", str(output_dir), "--bulk-file", str(offline),
+	                           "--no-confirmation-store", "--confirm", "none", *options])
+
+
+def test_unchanged_delta_run_leaves_no_stale_delta(manabox_csv, reference_csv, offline, tmp_path, capsys):
+	state = str(tmp_path / "state.pickle")
+	convert(manabox_csv, reference_csv, offline, tmp_path / "out", "--delta-state", state)
+	assert (tmp_path / "out" / DELTA_FILE).exists()
+	capsys.readouterr()
+	
+	convert(manabox_csv, reference_csv, offline, tmp_path / "out", "--delta-state", state)
+	
+	assert not (tmp_path / "out" / DELTA_FILE).exists()
+	assert DELTA_FILE not in capsys.readouterr().out
@@ -0,0 +1,62 @@
+import csv
+import http.client
+import io
+import threading
+import zipfile
+
+import pytest
+
+from conversion_server import PENDING_FILE, ConversionServer, build_archive
+from convert_manabox_tcgp import ConversionResult, Converter
+
+
+@pytest.fixture
+def server(reference_csv, offline):
+	"""A conversion server on a free local port."""
+	converter = Converter(reference_csv, bulk_file=offline)
+	server = ConversionServer(("127.0.0.1", 0), converter)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+	converter.close()
+
+
+def post_status(server, content_length):
+	"""POST /convert with a raw Content-Length header and return the status code."""
+	connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+	connection.putrequest("POST", "/convert")
+	if content_length is not None:
+		connection.putheader("Content-Length", content_length)
+	connection.endheaders()
+	status = connection.getresponse().status
+	connection.close()
+	return status
+
+
+@pytest.mark.parametrize(("content_length", "status"), [
+		(None, 411),
+		("abc", 400),
+		("-5", 400),
+		(str(64 * 1024 * 1024 + 1), 413),
+])
+def test_bad_content_length_is_rejected(server, content_length, status):
+	assert post_status(server, content_length) == status
+
+
+def test_archive_lists_pending_confirmations(reference_csv, offline):
+	converter = Converter(reference_csv, bulk_file=offline)
+	result = ConversionResult(converter)
+	key = ("sun", "bloomburrow", "61", "lightly played", "")
+	matches = [(match, 82.0) for match in list(converter.ref_data)[:2]]
+	result.pending_confirmations.append((key, matches, converter.ref_data))
+	
+	with zipfile.ZipFile(io.BytesIO(build_archive(result))) as archive:
+		rows = list(csv.DictReader(io.TextIOWrapper(archive.open(PENDING_FILE), encoding="utf-8")))
+	result.close()
+	converter.close()
+	
+	assert [row["Rank"] for row in rows] == ["1", "2"]
+	assert {row["Card Name"] for row in rows} == {"sun"}
+	assert rows[0]["Product Name"] == converter.ref_data[matches[0][0]]["Product Name"]
@@ -0,0 +1,50 @@
+from delta_state import DeltaState, row_fingerprint
+
+ROW = {"Name": "Sun", "Set code": "BLB", "Collector number": "61", "Quantity": "2"}
+STAGED_ROW = {"TCGplayer Id": 1001, "Condition": "Near Mint", "Add to Quantity": 2}
+
+
+def test_only_staged_rows_are_replayed(tmp_path):
+	path = tmp_path / "state.pickle"
+	given_up_row = dict(ROW, Name="Moon")
+	state = DeltaState(path, "signature")
+	state.record(row_fingerprint(ROW), STAGED_ROW)
+	state.record(row_fingerprint(given_up_row))
+	state.save([STAGED_ROW])
+	
+	state = DeltaState(path, "signature")
+	
+	changed_quantity = dict(ROW, Quantity="5")
+	assert state.replay(row_fingerprint(changed_quantity), changed_quantity) == dict(STAGED_ROW, **{"Add to Quantity": 5})
+	assert state.replay(row_fingerprint(given_up_row), given_up_row) is None
+
+
+def test_deferred_rows_are_counted_as_matched(tmp_path):
+	state = DeltaState(tmp_path / "state.pickle", "signature")
+	state.record(row_fingerprint(ROW), STAGED_ROW)
+	state.record(row_fingerprint(dict(ROW, Name="Moon")), deferred=True)
+	
+	assert (state.matched, state.deferred) == (2, 1)
+
+
+def test_other_signature_discards_state(tmp_path):
+	path = tmp_path / "state.pickle"
+	state = DeltaState(path, "signature")
+	state.record(row_fingerprint(ROW), STAGED_ROW)
+	state.save([STAGED_ROW])
+	
+	assert DeltaState(path, "other signature").replay(row_fingerprint(ROW), ROW) is None
+
+
+def test_changed_signature_keeps_previous_totals(tmp_path):
+	path = tmp_path / "state.pickle"
+	sun = {"TCGplayer Id": 1001, "Condition": "Near Mint", "Add to Quantity": 2}
+	lord = {"TCGplayer Id": 1004, "Condition": "Lightly Played", "Add to Quantity": 3}
+	state = DeltaState(path, "catalog before")
+	state.record(row_fingerprint(ROW), sun)
+	state.save([sun, lord])
+	
+	state = DeltaState(path, "catalog after")
+	
+	assert state.replay(row_fingerprint(ROW), ROW) is None
+	assert list(state.changes([sun, dict(lord, **{"Add to Quantity": 5})])) == [dict(lord, **{"Add to Quantity": 2})]
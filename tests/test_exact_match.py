@@ -0,0 +1,46 @@
+import pytest
+
+from convert_manabox_tcgp import ConversionResult, Converter, find_exact_match
+
+
+@pytest.fixture
+def converter(catalog_csv, offline):
+	"""A converter over a reference with several sets sharing names and numbers."""
+	converter = Converter(catalog_csv, bulk_file=offline)
+	yield converter
+	converter.close()
+
+
+def convert_row(converter, **row):
+	"""Match one Manabox row and return the staged entry and the outcome counts."""
+	result = ConversionResult(converter)
+	entry = converter.map_fields(dict({"Quantity": "1", "Foil": "normal"}, **row), result)
+	result.close()
+	return entry, dict(result.report.counts)
+
+
+def test_numbered_exact_hit_picks_own_condition(converter):
+	entry, counts = convert_row(converter, **{"Name": "Sun", "Set name": "Bloomburrow", "Collector number": "61",
+	                                          "Condition": "lightly_played"})
+	
+	assert entry["TCGplayer Id"] == 2002
+	assert counts.get("exact_key") == 1
+	assert "fuzzy_matched" not in counts
+
+
+def test_unnumbered_exact_hit_needs_a_single_printing(converter):
+	entry, counts = convert_row(converter, **{"Name": "Sunshower Druid", "Set name": "Bloomburrow",
+	                                          "Collector number": "", "Condition": "near_mint"})
+	
+	assert entry["TCGplayer Id"] == 2004
+	assert counts.get("exact_unnumbered") == 1
+
+
+def test_ambiguous_unnumbered_key_falls_through_to_fuzzy(converter):
+	normalized_key = ("sun titan", "foundations", "", "near mint")
+	
+	assert find_exact_match(normalized_key, converter.ref_data, converter.reference_index) is None
+	_, counts = convert_row(converter, **{"Name": "Sun Titan", "Set name": "Foundations", "Collector number": "",
+	                                      "Condition": "near_mint"})
+	assert counts.get("fuzzy_matched") == 1
+	assert "exact_unnumbered" not in counts
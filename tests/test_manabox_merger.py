@@ -0,0 +1,77 @@
+import csv
+from collections import defaultdict
+
+import pytest
+
+from manabox_merger import (
+    GROUPING_COLS, merge_inventories_parallel, merge_inventory, merge_inventory_streaming,
+)
+
+HEADER = ("Name,Set code,Set name,Collector number,Foil,Rarity,Quantity,ManaBox ID,Scryfall ID,Purchase price,"
+          "Misprint,Altered,Condition,Language,Purchase price currency\n")
+FIRST_EXPORT = [
+    "Sun,BLB,Bloomburrow,061,normal,common,2,1,id-1,0.25,false,false,near_mint,en,USD",
+    "Sun,BLB,Bloomburrow,061,foil,common,1,2,id-1,0.75,false,false,near_mint,en,USD",
+    "Lord,FDN,Foundations,191,normal,rare,3,3,id-2,1.5,false,,lightly_played,en,USD",
+    "Sun,BLB,Bloomburrow,061,normal,common,1,1,id-1,0.35,false,false,near_mint,en,USD",
+    "Titan,M11,Magic 2011,35,normal,mythic,,4,id-3,2,false,true,damaged,ja,EUR",
+]
+SECOND_EXPORT = [
+    "Lord,FDN,Foundations,191,normal,rare,2,3,id-2,1.1,false,,lightly_played,en,USD",
+    "Sun,BLB,Bloomburrow,061,foil,common,4,2,id-1,,false,false,near_mint,en,USD",
+    "Titan,M11,Magic 2011,35,normal,mythic,1,4,id-3,2.5,false,true,damaged,ja,EUR",
+]
+
+
+def write_export(path, rows):
+    """Write a Manabox export with the given rows."""
+    path.write_text(HEADER + "\n".join(rows) + "\n", encoding="utf-8")
+    return path
+
+
+def quantities(path):
+    """Merged quantity per item."""
+    totals = defaultdict(float)
+    with open(path, newline="", encoding="utf-8") as merged_file:
+        for row in csv.DictReader(merged_file):
+            totals[tuple(row[col] for col in GROUPING_COLS)] += float(row["Quantity"])
+    return dict(totals)
+
+
+@pytest.fixture
+def merged_outputs(tmp_path, capsys):
+    """The two exports merged in memory, streamed in small chunks and on two worker processes."""
+    first = write_export(tmp_path / "first.csv", FIRST_EXPORT)
+    second = write_export(tmp_path / "second.csv", SECOND_EXPORT)
+    both = write_export(tmp_path / "both.csv", FIRST_EXPORT + SECOND_EXPORT)
+    outputs = {mode: tmp_path / f"{mode}.csv" for mode in ("memory", "stream", "parallel")}
+    merge_inventory(both, outputs["memory"])
+    merge_inventory_streaming(both, outputs["stream"], chunk_rows=2)
+    merge_inventories_parallel([first, second], outputs["parallel"], workers=2, chunk_rows=2)
+    return outputs, capsys.readouterr().out
+
+
+def test_every_mode_passes_verification(merged_outputs):
+    _, output = merged_outputs
+
+    assert output.count("ALL VERIFICATIONS PASSED") == 3
+    assert "VERIFICATION FAILED" not in output
+
+
+def test_modes_agree_on_quantities(merged_outputs):
+    outputs, _ = merged_outputs
+    expected = quantities(outputs["memory"])
+
+    assert expected[("Sun", "BLB", "061", "en", "foil", "near_mint", "USD", "false", "id-1")] == 5
+    for mode in ("stream", "parallel"):
+        merged = quantities(outputs[mode])
+        assert merged.keys() == expected.keys()
+        for item, quantity in expected.items():
+            assert merged[item] == pytest.approx(quantity)
+
+
+def test_modes_write_the_same_file(merged_outputs):
+    outputs, _ = merged_outputs
+
+    assert outputs["stream"].read_bytes() == outputs["memory"].read_bytes()
+    assert outputs["parallel"].read_bytes() == outputs["memory"].read_bytes()
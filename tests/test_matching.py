@@ -0,0 +1,48 @@
+import pytest
+
+from convert_manabox_tcgp import Converter, find_best_match
+
+KEYS = [
+	# Number bucket hit, with the exact key and with other conditions and a misspelling
+	("sun", "bloomburrow", "61", "near mint"),
+	("sun", "bloomburrow", "61", "damaged"),
+	("sunn", "bloomburrow", "61", "near mint foil"),
+	("sun titan", "foundations", "34", "lightly played"),
+	# Number known elsewhere only, and unknown numbers: the search widens to the set tier
+	("sun titan", "bloomburrow", "61", "near mint"),
+	("season of the burrow", "bloomburrow", "999", "near mint"),
+	("sunshower druid", "bloomburrow", "", "near mint"),
+	# Set missing from the reference too: the global tier decides
+	("sun titan", "commander legends", "777", "near mint"),
+	("lord of the undead", "unknown set", "", "moderately played"),
+	("enduring innocence", "duskmourn", "", "near mint"),
+]
+
+
+@pytest.fixture
+def converter(catalog_csv, offline):
+	"""A converter over a reference with several sets sharing names and numbers."""
+	converter = Converter(catalog_csv, bulk_file=offline)
+	yield converter
+	converter.close()
+
+
+@pytest.mark.parametrize("normalized_key", KEYS, ids=lambda key: "|".join(key))
+def test_indexed_ranking_matches_full_scan(converter, normalized_key):
+	full_scan = find_best_match(normalized_key, converter.ref_data)
+	indexed = find_best_match(normalized_key, converter.ref_data, converter.reference_index)
+	
+	assert bool(indexed) == bool(full_scan)
+	if full_scan:
+		best_score = full_scan[0][1]
+		assert indexed[0][1] == best_score
+		assert indexed[0][0] in {match for match, score in full_scan if score == best_score}
+
+
+def test_empty_number_bucket_widens_search(converter):
+	assert not converter.reference_index["number"].get("999")
+	
+	best_match, _ = find_best_match(("season of the burrow", "bloomburrow", "999", "near mint"),
+	                                converter.ref_data, converter.reference_index)[0]
+	
+	assert converter.ref_data[best_match]["TCGplayer Id"] == 2005
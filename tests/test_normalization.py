@@ -0,0 +1,99 @@
+import math
+
+import pandas as pd
+import pytest
+
+from normalization import normalize_card_name, normalize_key, normalize_key_columns, normalize_set_name
+
+CARD_NAMES = [
+	"Lightning Bolt",
+	"Æther Vial",
+	"Lim-Dûl's Vault",
+	"Jötun Grunt",
+	"Déjà Vu",
+	"Séance",
+	"Fire // Ice",
+	"Delver of Secrets // Insectile Aberration",
+	"Sol Ring (Borderless)",
+	"Forest (285) (Showcase)",
+	"Bolt (Promo",
+	"Nai\u0308ve Combining Mark",  # Decomposed diaeresis
+	"Sm\u0327e\u0301agol",  # Stacked combining marks
+	"Ｆｕｌｌｗｉｄｔｈ Ｎａｍｅ",
+	"Ætherflux Reservoir!?",
+	"Ghazbán Ogre",
+	"Urza's Saga, Revisited",
+	"  Padded  ",
+	"火の玉",
+	"",
+	None,
+]
+SET_NAMES = [
+	"Bloomburrow",
+	"Commander: Bloomburrow",
+	"The List",
+	"PLST",
+	"Magic 2015 (M15)",
+	"Prerelease Cards",
+	"Ravnica: Clue Edition",
+	"Ünhinged",
+	"",
+	None,
+]
+CONDITIONS = ["Near Mint", "Near Mint Foil", "Lightly Played", "DAMAGED", "", None]
+NUMBERS = ["61", "061", "12a", "★12", "PLST-ABC-123", "1-2", "abc", " 7 ", "", None]
+
+
+def rows():
+	"""Every name with rotating sets, conditions and numbers, so each value meets the others."""
+	return [
+		(card_name, SET_NAMES[index % len(SET_NAMES)], CONDITIONS[index % len(CONDITIONS)], NUMBERS[index % len(NUMBERS)])
+		for index, card_name in enumerate(CARD_NAMES * 3)
+	]
+
+
+def is_missing(value):
+	return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def scalar_key(card_name, set_name, condition, number):
+	"""The per-row path, with the exclusions normalize_key_columns applies to missing cells."""
+	if is_missing(card_name) or is_missing(set_name) or is_missing(condition):
+		return None
+	return normalize_key(card_name, set_name, condition, "" if is_missing(number) else number)
+
+
+@pytest.mark.parametrize("dtype", [object, "str", "category"])
+def test_normalize_key_columns_matches_scalar_path(dtype):
+	frame = pd.DataFrame(rows(), columns=["name", "set", "condition", "number"]).astype(dtype)
+	
+	keys = normalize_key_columns(frame["name"], frame["set"], frame["condition"], frame["number"])
+	
+	for row, key in zip(rows(), keys):
+		assert key == scalar_key(*row), row
+
+
+@pytest.mark.parametrize("card_name", [name for name in CARD_NAMES if name is not None])
+def test_card_names_match_scalar_normalization(card_name):
+	frame = pd.Series([card_name])
+	key = normalize_key_columns(frame, pd.Series(["Bloomburrow"]), pd.Series(["Near Mint"]), pd.Series(["1"]))[0]
+	
+	assert key[0] == normalize_card_name(card_name)
+
+
+@pytest.mark.parametrize("set_name", [name for name in SET_NAMES if name is not None])
+def test_set_names_match_scalar_normalization(set_name):
+	key = normalize_key_columns(pd.Series(["Sun"]), pd.Series([set_name]), pd.Series(["Near Mint"]), pd.Series(["1"]))[0]
+	
+	if "prerelease cards" in normalize_set_name(set_name):
+		assert key is None
+	else:
+		assert key[1] == normalize_set_name(set_name)
+
+
+def test_filtered_frames_keep_their_index():
+	frame = pd.DataFrame(rows(), columns=["name", "set", "condition", "number"]).iloc[5::2]
+	
+	keys = normalize_key_columns(frame["name"], frame["set"], frame["condition"], frame["number"])
+	
+	assert keys == [scalar_key(*row) for row in rows()[5::2]]
@@ -0,0 +1,51 @@
+import csv
+import io
+import multiprocessing
+import zipfile
+
+import pytest
+
+import convert_manabox_tcgp
+from conversion_server import build_archive
+from convert_manabox_tcgp import ConversionResult, Converter
+
+pytestmark = pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(),
+                                reason="Parallel scoring needs fork")
+
+MANABOX_ROWS = """Name,Set name,Collector number,Foil,Quantity,Condition
+Sunn,Bloomburrow,61,normal,2,near_mint
+Sun,Bloomburrow,61,foil,1,damaged
+Sun Titan,Bloomburrow,61,normal,1,near_mint
+Season of the Burow,Bloomburrow,999,normal,1,near_mint
+Sunshower Druid,Bloomburrow,,normal,4,lightly_played
+Sun Titan,Commander Legends,777,normal,1,near_mint
+Lord of the Undead,Unknown Set,,normal,1,moderately_played
+Enduring Innocence,Duskmourn,,foil,1,near_mint
+Sun Titan,Foundations,34,normal,2,lightly_played
+Lord of Undead,Magic 2011,92,normal,1,heavily_played
+"""
+
+
+def convert_archive(catalog_csv, offline, workers):
+	"""Convert the rows with the given number of scoring processes and return the output files."""
+	converter = Converter(catalog_csv, bulk_file=offline, workers=workers)
+	assert (converter.match_pool is not None) == (workers > 1)
+	result = ConversionResult(converter)
+	try:
+		converter.convert(csv.DictReader(io.StringIO(MANABOX_ROWS)), result)
+		with zipfile.ZipFile(io.BytesIO(build_archive(result))) as archive:
+			return {name: archive.read(name) for name in archive.namelist()}
+	finally:
+		result.close()
+		converter.close()
+
+
+def test_parallel_output_matches_serial(catalog_csv, offline, monkeypatch):
+	# Send even this small batch to the worker processes
+	monkeypatch.setattr(convert_manabox_tcgp, "MIN_PARALLEL_KEYS", 1)
+	
+	serial = convert_archive(catalog_csv, offline, workers=1)
+	parallel = convert_archive(catalog_csv, offline, workers=2)
+	
+	assert "pending_confirmation.csv" in serial
+	assert parallel == serial
@@ -0,0 +1,39 @@
+import os
+import pickle
+
+import pytest
+
+import convert_manabox_tcgp
+from convert_manabox_tcgp import Converter
+
+
+def test_missing_reference_raises(tmp_path, offline):
+	with pytest.raises(FileNotFoundError, match="Reference file not found"):
+		Converter(tmp_path / "missing.csv", bulk_file=offline)
+
+
+def test_main_exits_on_missing_reference(tmp_path, offline):
+	manabox_csv = tmp_path / "manabox.csv"
+	manabox_csv.write_text("Name,Set name,Quantity\n", encoding="utf-8")
+	
+	with pytest.raises(SystemExit) as exit_info:
+		convert_manabox_tcgp.main(["--manabox", str(manabox_csv), "--reference", str(tmp_path / "missing.csv"),
+		                           "--output-dir", str(tmp_path / "out"), "--bulk-file", str(offline),
+		                           "--no-confirmation-store", "--confirm", "none"])
+	
+	assert exit_info.value.code == 1
+
+
+def test_recently_used_reference_caches_are_kept(tmp_path, offline, monkeypatch):
+	monkeypatch.setattr(convert_manabox_tcgp, "REFERENCE_CACHE_KEEP", 2)
+	cache_dir = convert_manabox_tcgp.REFERENCE_CACHE_DIR
+	paths = [cache_dir / f"reference_{index}.pickle" for index in range(3)]
+	cache_dir.mkdir()
+	for age, path in enumerate(paths):
+		path.write_bytes(pickle.dumps({"index": age}))
+		os.utime(path, (1000 + age, 1000 + age))
+	
+	assert convert_manabox_tcgp.load_reference_cache(paths[0]) == {"index": 0}
+	convert_manabox_tcgp.save_reference_cache(cache_dir / "reference_new.pickle", {"index": 3})
+	
+	assert sorted(path.name for path in cache_dir.glob("reference_*.pickle")) == ["reference_0.pickle", "reference_new.pickle"]
@@ -0,0 +1,27 @@
+import time
+
+from scryfall_cache import ScryfallCache
+
+
+def test_memory_entries_expire(tmp_path):
+	cache = ScryfallCache(tmp_path / "cache.sqlite3", negative_ttl=60)
+	cache["card|Sun|blb"] = None
+	assert "card|Sun|blb" in cache
+	
+	value, expires_at = cache.memory["card|Sun|blb"]
+	cache.memory["card|Sun|blb"] = (value, time.time() - 1)
+	cache.connection.execute("UPDATE entries SET stored_at = ?", (time.time() - 120,))
+	
+	assert "card|Sun|blb" not in cache
+	assert "card|Sun|blb" not in cache.memory
+
+
+def test_memory_is_bounded_least_recently_used(tmp_path):
+	cache = ScryfallCache(tmp_path / "cache.sqlite3", memory_entries=2)
+	cache.update({"id|a": {"name": "A"}, "id|b": {"name": "B"}})
+	assert "id|a" in cache
+	cache["id|c"] = {"name": "C"}
+	
+	assert list(cache.memory) == ["id|a", "id|c"]
+	assert "id|b" in cache
+	assert cache["id|b"] == {"name": "B"}
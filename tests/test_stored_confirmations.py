@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+import convert_manabox_tcgp
+from confirmation_store import ConfirmationStore
+from convert_manabox_tcgp import ConversionResult, Converter
+
+# Misspelt and misnumbered, so only fuzzy scoring would find it
+ROW = {"Name": "Sunn", "Set name": "Bloomburrow", "Collector number": "99", "Condition": "near_mint", "Quantity": "1"}
+KEY = ("sunn", "bloomburrow", "99", "near mint")
+
+
+@pytest.fixture
+def spies(monkeypatch):
+	"""Record the keys sent to batch scoring and the rows sent to Scryfall."""
+	calls = {"scored": [], "scryfall": []}
+	
+	def score_candidate_tiers(normalized_keys, candidate_index, cdist_workers=-1):
+		calls["scored"].extend(normalized_keys)
+		return {}
+	
+	def fetch_scryfall_collection(self, identifiers):
+		calls["scryfall"].extend(identifiers)
+		return {}
+	
+	def submit_scryfall_card(self, card_name, set_code, collector_number=None):
+		calls["scryfall"].append(card_name)
+	
+	monkeypatch.setattr(convert_manabox_tcgp, "score_candidate_tiers", score_candidate_tiers)
+	monkeypatch.setattr(Converter, "fetch_scryfall_collection", fetch_scryfall_collection)
+	monkeypatch.setattr(Converter, "submit_scryfall_card", submit_scryfall_card)
+	return calls
+
+
+def prescore_and_prefetch(converter):
+	"""Run the up-front scoring and Scryfall prefetch for ROW as an online run would."""
+	converter.scryfall_bulk = None
+	converter.scryfall_cache = {}
+	converter.scryfall_client = SimpleNamespace(wait=lambda futures: None, close=lambda: None)
+	result = ConversionResult(converter)
+	converter.prescore_inventory([ROW], result)
+	converter.prefetch_scryfall([ROW], result)
+	result.close()
+
+
+def test_unreviewed_key_is_scored_and_prefetched(reference_csv, offline, spies):
+	converter = Converter(reference_csv, bulk_file=offline)
+	prescore_and_prefetch(converter)
+	converter.close()
+	
+	assert spies["scored"] == [KEY]
+	assert spies["scryfall"]
+
+
+@pytest.mark.parametrize("stored_match", [("sun", "bloomburrow", "61", "near mint", ""), None])
+def test_stored_decision_skips_scoring_and_prefetch(reference_csv, offline, spies, tmp_path, stored_match):
+	store = ConfirmationStore(tmp_path / "confirmations.sqlite3")
+	catalog_version = convert_manabox_tcgp.reference_catalog_version(reference_csv)
+	store.record(catalog_version, {KEY: stored_match})
+	converter = Converter(reference_csv, bulk_file=offline, confirmation_store=store)
+	prescore_and_prefetch(converter)
+	converter.close()
+	store.close()
+	
+	assert spies == {"scored": [], "scryfall": []}
@@ -0,0 +1,53 @@
+import random
+
+from convert_manabox_tcgp import OUTPUT_FIELDS
+from streaming import EntryAggregator
+
+
+def sample_entries(count=500, seed=7):
+	"""Staged rows with many repeated (TCGplayer Id, Condition) pairs."""
+	rng = random.Random(seed)
+	conditions = ["Near Mint", "Near Mint Foil", "Lightly Played", "Damaged"]
+	entries = []
+	for _ in range(count):
+		tcgplayer_id = rng.randrange(60)
+		entries.append({
+				"TCGplayer Id":          tcgplayer_id,
+				"Product Line":          "Magic",
+				"Set Name":              f"Set {tcgplayer_id % 7}",
+				"Product Name":          f"Card {tcgplayer_id}",
+				"Number":                str(tcgplayer_id),
+				"Rarity":                "Common",
+				"Condition":             rng.choice(conditions),
+				"Add to Quantity":       rng.randrange(1, 5),
+				"TCG Marketplace Price": f"{rng.random() * 10:.2f}",
+		})
+	return entries
+
+
+def in_memory_merge(entries):
+	"""Reference merge: the first entry per key keeps its fields and position, quantities add up."""
+	merged = {}
+	for entry in entries:
+		key = (entry["TCGplayer Id"], entry["Condition"])
+		if key in merged:
+			merged[key]["Add to Quantity"] += entry["Add to Quantity"]
+		else:
+			merged[key] = dict(entry)
+	return list(merged.values())
+
+
+def test_spilled_merge_matches_in_memory_merge(tmp_path):
+	entries = sample_entries()
+	expected = in_memory_merge(entries)
+	
+	for memory_budget in (1, 3, 17, len(entries)):
+		aggregator = EntryAggregator(OUTPUT_FIELDS, memory_budget, directory=tmp_path)
+		for entry in entries:
+			aggregator.add(dict(entry))
+		merged = list(aggregator)
+		spills = aggregator.spills
+		aggregator.close()
+		
+		assert (spills > 0) == (memory_budget < len(expected))
+		assert merged == expected